@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.scratch import scratch_engine
+from models.postgres_models import Room, RoomStatusEnum, User
+from services.postgres_crud.booking_crud import BookingCRUD
+
+SCHEMA = "bench_reserve"
+
+
+async def seed(session_maker, rooms_count: int, users_count: int):
+    async with session_maker() as session:
+        await session.execute(text("TRUNCATE bookings, rooms, users RESTART IDENTITY CASCADE"))
+        await session.execute(insert(User), [
+            {"telegram_id": i, "name": "Bench", "surname": str(i)} for i in range(1, users_count + 1)
+        ])
+        await session.execute(insert(Room), [
+            {
+                "number": f"B{i:06}",
+                "human_name": "Стандарт",
+                "type": "standard",
+                "price": 3500,
+                "capacity": 2,
+                "status": RoomStatusEnum.AVAILABLE,
+            }
+            for i in range(1, rooms_count + 1)
+        ])
+        await session.commit()
+
+
+async def sample_lock_waits(engine, samples: list[int], stop: asyncio.Event):
+    async with engine.connect() as conn:
+        while not stop.is_set():
+            waiting = await conn.scalar(text(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+            ))
+            samples.append(waiting)
+            await asyncio.sleep(0.005)
+
+
+async def run_scenario(engine, session_maker, name: str, attempts: int, concurrency: int, pick):
+    latencies = []
+    results = {"reserved": 0, "conflicts": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt(user_id: int):
+        room_id, check_in, check_out = pick()
+        async with semaphore, session_maker() as session:
+            started = time.perf_counter()
+            booking_id = await BookingCRUD(session).reserve(
+                total_price=3500,
+                user_id=user_id,
+                room_id=room_id,
+                check_in=check_in,
+                check_out=check_out
+            )
+            if booking_id is None:
+                results["conflicts"] += 1
+            else:
+                await session.commit()
+                results["reserved"] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    lock_samples: list[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_lock_waits(engine, lock_samples, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(attempt(user_id) for user_id in range(1, attempts + 1)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await sampler
+
+    latencies.sort()
+    print(
+        f"{name:>8} | {attempts:>8} | {results['reserved']:>8} | {results['conflicts']:>9} | "
+        f"{attempts / elapsed:>8.0f} | {statistics.median(latencies):>7.1f} | "
+        f"{latencies[int(len(latencies) * 0.95) - 1]:>7.1f} | {latencies[-1]:>7.1f} | "
+        f"{max(lock_samples, default=0):>9} | {statistics.mean(lock_samples or [0]):>9.2f}"
+    )
+
+
+async def main(attempts: int, concurrency: int, rooms_count: int):
+    async with scratch_engine(SCHEMA, pool_size=concurrency + 1, max_overflow=0) as engine:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+        base = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+        def same_room():
+            return 1, base, base + timedelta(days=3)
+
+        def spread():
+            check_in = base + timedelta(days=random.randint(0, 90))
+            return random.randint(1, rooms_count), check_in, check_in + timedelta(days=random.randint(1, 7))
+
+        print(
+            f"{'scenario':>8} | {'attempts':>8} | {'reserved':>8} | {'conflicts':>9} | "
+            f"{'per sec':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'max ms':>7} | "
+            f"{'max waits':>9} | {'avg waits':>9}"
+        )
+        for name, pick in (("hot", same_room), ("spread", spread)):
+            await seed(session_maker, rooms_count, attempts)
+            await run_scenario(engine, session_maker, name, attempts, concurrency, pick)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent BookingCRUD.reserve() calls and lock contention")
+    parser.add_argument("--attempts", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main(args.attempts, args.concurrency, args.rooms))
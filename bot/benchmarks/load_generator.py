@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage
+from aiogram.types import CallbackQuery, Chat, InlineKeyboardMarkup, Message, TelegramObject, Update
+from aiogram.types import User as TelegramUser
+from sqlalchemy import delete, select
+
+from config.config import config
+from main import create_dispatcher, init_backends
+from models.postgres_models import Booking, User
+from services.mongo_database import MongoDatabase
+from services.postgres_database import PostgresDatabase
+from services.scheduler import BackgroundScheduler
+
+# Synthetic telegram ids live above this value so they can be cleaned up afterwards
+BASE_TELEGRAM_ID = 2_000_000_000
+
+
+class StubSession(BaseSession):
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter = Counter()
+        self.markups: Dict[int, InlineKeyboardMarkup] = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+        chat_id = getattr(method, "chat_id", None)
+        markup = getattr(method, "reply_markup", None)
+        if chat_id is not None and isinstance(markup, InlineKeyboardMarkup):
+            self.markups[chat_id] = markup
+
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+                text=method.text
+            )
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        # Synthetic users never download files; an empty body keeps the session usable if one is requested
+        self.calls["stream_content"] += 1
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class HandlerTimerMiddleware(BaseMiddleware):
+    def __init__(self, latencies: Dict[str, list]):
+        self.latencies = latencies
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            name = data["handler"].callback.__name__
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+
+
+class SyntheticUser:
+    _update_ids = itertools.count(1)
+
+    def __init__(self, telegram_id: int, dp, bot: Bot, session: StubSession, think_time: float):
+        self.telegram_id = telegram_id
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.think_time = think_time
+        self.tg_user = TelegramUser(id=telegram_id, is_bot=False, first_name="Load", last_name=str(telegram_id))
+        self.chat = Chat(id=telegram_id, type="private")
+
+    def _message(self, text: str | None = None) -> Message:
+        return Message(
+            message_id=next(self._update_ids),
+            date=datetime.now(),
+            chat=self.chat,
+            from_user=self.tg_user,
+            text=text
+        )
+
+    async def _feed(self, update: Update):
+        self.session.markups.pop(self.telegram_id, None)
+        await self.dp.feed_update(self.bot, update)
+        if self.think_time:
+            await asyncio.sleep(random.expovariate(1 / self.think_time))
+
+    async def send_text(self, text: str):
+        await self._feed(Update(update_id=next(self._update_ids), message=self._message(text)))
+
+    async def press(self, data: str):
+        await self._feed(Update(
+            update_id=next(self._update_ids),
+            callback_query=CallbackQuery(
+                id=str(next(self._update_ids)),
+                from_user=self.tg_user,
+                chat_instance="load",
+                message=self._message(),
+                data=data
+            )
+        ))
+
+    def buttons(self, prefix: str) -> list[str]:
+        markup = self.session.markups.get(self.telegram_id)
+        if not markup:
+            return []
+        return [
+            button.callback_data
+            for row in markup.inline_keyboard
+            for button in row
+            if button.callback_data and button.callback_data.startswith(prefix)
+        ]
+
+    async def run(self, horizon_days: int):
+        await self.send_text("/start")
+        await self.send_text("Load")
+        await self.send_text(str(self.telegram_id))
+
+        check_in = datetime.now() + timedelta(days=random.randint(1, horizon_days))
+        check_out = check_in + timedelta(days=random.randint(1, 7))
+        await self.send_text("🛎 Бронирование")
+        await self.send_text(check_in.strftime("%d.%m.%Y"))
+        await self.send_text(check_out.strftime("%d.%m.%Y"))
+
+        rooms = self.buttons("select_")
+        if not rooms:
+            return
+        await self.press(random.choice(rooms))
+        await self.press("confirm_booking")
+
+        await self.send_text("💳 Оплатить бронь")
+        bookings = [data for data in self.buttons("pay_") if data != "pay_back"]
+        if not bookings:
+            return
+        await self.press(random.choice(bookings))
+        await self.press("method_card")
+
+
+def percentile(values: list[float], share: float) -> float:
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def report(latencies: Dict[str, list], elapsed: float, session: StubSession):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{'handler':<28} | {'count':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        print(
+            f"{name:<28} | {len(values):>6} | {percentile(values, 0.5):>8.1f} | "
+            f"{percentile(values, 0.95):>8.1f} | {percentile(values, 0.99):>8.1f}"
+        )
+    print(f"\n{total} updates in {elapsed:.1f}s: {total / elapsed:.0f} updates/s")
+    print(f"Telegram API calls (stubbed): {dict(session.calls)}")
+
+
+async def cleanup(postgres_db: PostgresDatabase):
+    async with postgres_db.session_scope() as session:
+        synthetic_users = select(User.id).where(User.telegram_id >= BASE_TELEGRAM_ID)
+        await session.execute(delete(Booking).where(Booking.user_id.in_(synthetic_users)))
+        await session.execute(delete(User).where(User.telegram_id >= BASE_TELEGRAM_ID))
+
+
+async def main(users: int, concurrency: int, think_time: float, horizon_days: int, keep_data: bool):
+    logging.getLogger().setLevel(logging.WARNING)
+
+    stub_session = StubSession()
+    bot = Bot(token=config.BOT_TOKEN.get_secret_value(), session=stub_session)
+    postgres_db = PostgresDatabase()
+    mongo_db = MongoDatabase()
+    scheduler = BackgroundScheduler(postgres_db)
+    dp = create_dispatcher(postgres_db, mongo_db, scheduler)
+
+    latencies: Dict[str, list] = defaultdict(list)
+    dp.message.middleware(HandlerTimerMiddleware(latencies))
+    dp.callback_query.middleware(HandlerTimerMiddleware(latencies))
+
+    await init_backends(postgres_db, mongo_db)
+    scheduler.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_user(index: int):
+        async with semaphore:
+            user = SyntheticUser(BASE_TELEGRAM_ID + index, dp, bot, stub_session, think_time)
+            try:
+                await user.run(horizon_days)
+            except Exception as e:
+                logging.error(f"Synthetic user {user.telegram_id} failed: {e}")
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_user(index) for index in range(users)))
+        elapsed = time.perf_counter() - started
+        report(latencies, elapsed, stub_session)
+    finally:
+        await scheduler.stop()
+        if not keep_data:
+            await cleanup(postgres_db)
+        await postgres_db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Drive the real dispatcher with synthetic users (Telegram API stubbed)"
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between steps, seconds")
+    parser.add_argument("--horizon-days", type=int, default=180)
+    parser.add_argument("--memory-fsm", action="store_true", help="use MemoryStorage instead of Postgres")
+    parser.add_argument("--keep-data", action="store_true", help="keep synthetic users and bookings")
+    parser.add_argument("--throttle", action="store_true", help="keep per-user throttling enabled")
+    args = parser.parse_args()
+    if args.memory_fsm:
+        config.FSM_STORAGE = "memory"
+    if not args.throttle:
+        # Synthetic users click far faster than people do and would mostly be throttled
+        config.THROTTLE_RATE = 0
+    asyncio.run(main(args.users, args.concurrency, args.think_time, args.horizon_days, args.keep_data))
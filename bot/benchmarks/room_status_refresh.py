@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, event, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.scratch import scratch_engine
+from models.postgres_models import Booking, BookingStatusEnum, Room, RoomStatusEnum, User
+from services.postgres_crud.room_crud import RoomCRUD
+
+SCHEMA = "bench_room_status"
+
+
+async def legacy_refresh(session: AsyncSession):
+    # Per-room loop that refresh_rooms_availability used before the bulk UPDATEs
+    rooms = (await session.execute(select(Room))).scalars().all()
+    for room in rooms:
+        active_bookings = await session.execute(
+            select(Booking).where(
+                and_(
+                    Booking.room_id == room.id,
+                    Booking.check_out >= datetime.now(),
+                    Booking.status == BookingStatusEnum.ACTIVE
+                )
+            )
+        )
+        if active_bookings.scalars().first():
+            room.status = RoomStatusEnum.BOOKED
+        elif room.status not in (RoomStatusEnum.MAINTENANCE, RoomStatusEnum.CLOSED):
+            room.status = RoomStatusEnum.AVAILABLE
+    await session.commit()
+
+
+async def seed(session_maker, rooms_count: int):
+    now = datetime.now()
+    async with session_maker() as session:
+        await session.execute(text("TRUNCATE bookings, rooms, users RESTART IDENTITY CASCADE"))
+        await session.execute(insert(User), [{"telegram_id": 1, "name": "Bench", "surname": "User"}])
+        await session.execute(insert(Room), [
+            {
+                "number": f"B{i:06}",
+                "human_name": "Стандарт",
+                "type": "standard",
+                "price": 3500,
+                "capacity": 2,
+                "status": RoomStatusEnum.AVAILABLE,
+            }
+            for i in range(1, rooms_count + 1)
+        ])
+        bookings = []
+        for room_id in range(1, rooms_count + 1):
+            check_out = now - timedelta(days=random.randint(30, 60))
+            for _ in range(random.randint(0, 3)):
+                check_in = check_out + timedelta(days=random.randint(0, 30))
+                check_out = check_in + timedelta(days=random.randint(1, 7))
+                bookings.append({
+                    "total_price": 3500,
+                    "user_id": 1,
+                    "room_id": room_id,
+                    "check_in": check_in,
+                    "check_out": check_out,
+                    "status": BookingStatusEnum.ACTIVE,
+                    "paid": False,
+                })
+        if bookings:
+            await session.execute(insert(Booking), bookings)
+        await session.commit()
+
+
+async def measure(session_maker, counter: dict, refresh) -> tuple[float, int]:
+    async with session_maker() as session:
+        await session.execute(update(Room).values(status=RoomStatusEnum.AVAILABLE))
+        await session.commit()
+
+    async with session_maker() as session:
+        counter["queries"] = 0
+        started = time.perf_counter()
+        await refresh(session)
+        return (time.perf_counter() - started) * 1000, counter["queries"]
+
+
+async def main(sizes: list[int], repeat: int):
+    async with scratch_engine(SCHEMA) as engine:
+        counter = {"queries": 0}
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count_query(*args):
+            counter["queries"] += 1
+
+        session_maker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+        print(f"{'rooms':>8} | {'legacy ms':>10} | {'queries':>8} | {'bulk ms':>8} | {'queries':>8}")
+        for rooms_count in sizes:
+            await seed(session_maker, rooms_count)
+            legacy, bulk = [], []
+            for _ in range(repeat):
+                legacy.append(await measure(session_maker, counter, legacy_refresh))
+                bulk.append(await measure(
+                    session_maker, counter,
+                    lambda session: RoomCRUD(session).refresh_rooms_availability()
+                ))
+            legacy_ms, legacy_queries = min(legacy)
+            bulk_ms, bulk_queries = min(bulk)
+            print(
+                f"{rooms_count:>8} | {legacy_ms:>10.1f} | {legacy_queries:>8} | "
+                f"{bulk_ms:>8.1f} | {bulk_queries:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Room status refresh: per-room loop vs bulk UPDATE")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
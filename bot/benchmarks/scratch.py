@@ -0,0 +1,30 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from config.config import config
+from services.migrations import migrate
+
+
+@asynccontextmanager
+async def scratch_engine(schema: str, **engine_kwargs) -> AsyncEngine:
+    admin_engine = create_async_engine(config.postgres_url)
+    async with admin_engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+    engine = create_async_engine(
+        config.postgres_url,
+        connect_args={"server_settings": {"search_path": f"{schema},public"}},
+        **engine_kwargs
+    )
+    try:
+        async with engine.begin() as conn:
+            await migrate(conn)
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin_engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await admin_engine.dispose()
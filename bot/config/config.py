@@ -1,6 +1,6 @@
 from pydantic import SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -11,17 +11,66 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: int = 30
+    POSTGRES_POOL_RECYCLE: int = -1
+    POSTGRES_POOL_PRE_PING: bool = False
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
 
     MONGO_USER: str
     MONGO_PASSWORD: SecretStr
     MONGO_HOST: str
     MONGO_PORT: int
     MONGO_DB: str
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    REVIEW_BUFFER_SIZE: int = 100
+    REVIEW_FLUSH_INTERVAL: float = 1.0
 
     ADMINS: List[int]
     ADMIN_PASSWORD: str
     PGADMIN_EMAIL: str = ""   
     PGADMIN_PASSWORD: str = "" 
+
+    RUN_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_SECRET: SecretStr = SecretStr("")
+    WEBHOOK_MAX_CONCURRENT_UPDATES: int = 50
+    WEBHOOK_MAX_PENDING_UPDATES: int = 1000
+
+    FSM_STORAGE: Literal["memory", "postgres"] = "postgres"
+    FSM_TTL: int = 86400
+    FSM_PURGE_INTERVAL: int = 3600
+
+    STATUS_REFRESH_INTERVAL: int = 300
+    AVAILABILITY_RELOAD_INTERVAL: int = 60
+    STATS_ROLLUP_INTERVAL: int = 300
+    STATS_ROLLUP_LAG: int = 60
+    BOOKING_MAX_NIGHTS: int = 30
+    BOOKING_PARTITIONS_AHEAD: int = 12
+    BOOKING_PARTITION_INTERVAL: int = 86400
+    BOOKING_ARCHIVE_AFTER_DAYS: int = 365
+    BOOKING_ARCHIVE_TABLESPACE: str = ""
+    BOOKING_SWEEP_INTERVAL: int = 600
+    BOOKING_SWEEP_BATCH: int = 500
+    POOL_STATS_LOG_INTERVAL: int = 0
+
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 0
+    METRICS_LOG_INTERVAL: int = 0
+    SEARCH_CACHE_TTL: int = 60
+    SEARCH_CACHE_SIZE: int = 1024
+    ROOM_CATALOG_TTL: int = 600
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 3600
+    KEYBOARD_CACHE_SIZE: int = 512
+    THROTTLE_RATE: float = 2.0
+    THROTTLE_BURST: int = 5
+    CALLBACK_DEDUP: bool = True
     
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -53,5 +102,9 @@ class Settings(BaseSettings):
             f"{self.MONGO_DB}?authSource=admin"
         )
 
+    @property
+    def webhook_url(self):
+        return f"{self.WEBHOOK_BASE_URL.rstrip('/')}{self.WEBHOOK_PATH}"
+
 
 config = Settings()
\ No newline at end of file
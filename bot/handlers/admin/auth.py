@@ -7,7 +7,7 @@ from aiogram.fsm.state import StatesGroup, State
 from config.config import config
 from keyboards.admin import admin_panel_keyboard
 
-auth_router = Router()
+auth_router = Router(name="auth_router")
 
 class AdminAuth(StatesGroup):
     waiting_password = State()
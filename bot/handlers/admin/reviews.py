@@ -1,13 +1,18 @@
 import logging
+from datetime import datetime, timedelta
 from aiogram import Router, types, F
+from bson import ObjectId
+from bson.errors import InvalidId
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from keyboards.admin import admin_panel_keyboard
 from services.mongo_database import MongoDatabase
+from services.mongo_crud.review_crud import ReviewCRUD
 from config.config import config
 
-reviews_router = Router()
+reviews_router = Router(name="reviews_router")
 
 PAGE_SIZE = 5  
+EPOCH = datetime(1970, 1, 1)
 
 @reviews_router.callback_query(F.data == "admin_reviews")
 async def show_reviews(callback: types.CallbackQuery, mongo_db: MongoDatabase):
@@ -16,15 +21,16 @@ async def show_reviews(callback: types.CallbackQuery, mongo_db: MongoDatabase):
             await callback.answer("⛔ Доступ запрещен!")
             return
 
-        collection = mongo_db.get_reviews_collection()
-        all_reviews = await collection.find().sort("created_at", -1).to_list(None)
+        crud = ReviewCRUD(mongo_db.get_reviews_collection())
+        reviews, has_next = await crud.get_reviews_page(PAGE_SIZE)
         
-        if not all_reviews:
+        if not reviews:
             await callback.message.edit_text("📭 Нет отзывов для просмотра")
             return
 
-        text = format_reviews_page(all_reviews, page=0)
-        markup = build_reviews_keyboard(len(all_reviews), current_page=0)
+        total = await crud.count_reviews()
+        text = format_reviews_page(reviews, page=0, total=total)
+        markup = build_reviews_keyboard(reviews, current_page=0, has_next=has_next)
         
         await callback.message.edit_text(
             text,
@@ -36,13 +42,18 @@ async def show_reviews(callback: types.CallbackQuery, mongo_db: MongoDatabase):
         logging.error(f"Ошибка при получении отзывов: {str(e)}")
         await callback.answer("❌ Ошибка загрузки отзывов")
 
-def format_reviews_page(reviews: list, page: int) -> str:
-    start = page * PAGE_SIZE
-    end = start + PAGE_SIZE
-    page_reviews = reviews[start:end]
+def encode_cursor(review: dict) -> str:
+    created_at_ms = (review["created_at"] - EPOCH) // timedelta(milliseconds=1)
+    return f"{created_at_ms}_{review['_id']}"
+
+def decode_cursor(created_at_ms: str, review_id: str) -> tuple[datetime, ObjectId]:
+    return EPOCH + timedelta(milliseconds=int(created_at_ms)), ObjectId(review_id)
+
+def format_reviews_page(reviews: list, page: int, total: int) -> str:
+    total_pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, page + 1)
     
-    text = f"📃 <b>Отзывы (страница {page + 1})</b>\n\n"
-    for review in page_reviews:
+    text = f"📃 <b>Отзывы (страница {page + 1}/{total_pages})</b>\n\n"
+    for review in reviews:
         text += (
             f"👤 {review.get('user_name', 'Аноним')}\n"
             f"⭐ Оценка: {review['rating']}/10\n"
@@ -52,14 +63,20 @@ def format_reviews_page(reviews: list, page: int) -> str:
         )
     return text
 
-def build_reviews_keyboard(total: int, current_page: int) -> types.InlineKeyboardMarkup:
+def build_reviews_keyboard(reviews: list, current_page: int, has_next: bool) -> types.InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     if current_page > 0:
-        builder.button(text="⬅️ Назад", callback_data=f"reviews_page_{current_page - 1}")
+        builder.button(
+            text="⬅️ Назад",
+            callback_data=f"reviews_page_p_{current_page - 1}_{encode_cursor(reviews[0])}"
+        )
     
-    if (current_page + 1) * PAGE_SIZE < total:
-        builder.button(text="Вперед ➡️", callback_data=f"reviews_page_{current_page + 1}")
+    if has_next:
+        builder.button(
+            text="Вперед ➡️",
+            callback_data=f"reviews_page_n_{current_page + 1}_{encode_cursor(reviews[-1])}"
+        )
 
     builder.button(text="🔙 В меню", callback_data="admin_menu")
     builder.button(text="🔄 Обновить", callback_data="admin_reviews")
@@ -69,16 +86,29 @@ def build_reviews_keyboard(total: int, current_page: int) -> types.InlineKeyboar
 
 @reviews_router.callback_query(F.data.startswith("reviews_page_"))
 async def paginate_reviews(callback: types.CallbackQuery, mongo_db: MongoDatabase):
-    page = int(callback.data.split("_")[-1])
-    collection = mongo_db.get_reviews_collection()
-    all_reviews = await collection.find().sort("created_at", -1).to_list(None)
+    try:
+        _, _, direction, page, created_at_ms, review_id = callback.data.split("_")
+        page = int(page)
+        cursor = decode_cursor(created_at_ms, review_id)
+    except (ValueError, InvalidId):
+        # Buttons sent before the cursor format existed are still sitting in admins' chats
+        await callback.answer("⚠️ Список устарел, нажмите «🔄 Обновить»", show_alert=True)
+        return
+
+    crud = ReviewCRUD(mongo_db.get_reviews_collection())
+    if direction == "n":
+        reviews, has_next = await crud.get_reviews_page(PAGE_SIZE, after=cursor)
+    else:
+        reviews, _ = await crud.get_reviews_page(PAGE_SIZE, before=cursor)
+        has_next = True
     
-    if not all_reviews:
+    if not reviews:
         await callback.answer("📭 Отзывов больше нет")
         return
     
-    text = format_reviews_page(all_reviews, page)
-    markup = build_reviews_keyboard(len(all_reviews), page)
+    total = await crud.count_reviews()
+    text = format_reviews_page(reviews, page, total)
+    markup = build_reviews_keyboard(reviews, page, has_next)
     
     await callback.message.edit_text(
         text,
@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime, timedelta
 from aiogram import Router, types, F
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from models.postgres_models import RoomStatusEnum
@@ -9,7 +10,7 @@ from keyboards.admin import (
     rooms_management_keyboard
 )
 
-admin_rooms_router = Router()
+admin_rooms_router = Router(name="admin_rooms_router")
 
 @admin_rooms_router.callback_query(F.data == "admin_menu")
 async def admin_menu_handler(callback: types.CallbackQuery):
@@ -25,28 +26,38 @@ async def handle_rooms_management(callback: types.CallbackQuery):
         reply_markup=rooms_management_keyboard()
     )
 
-@admin_rooms_router.callback_query(F.data == "admin_stats")
+STATS_WINDOWS = (7, 30, 90)
+
+@admin_rooms_router.callback_query(F.data.startswith("admin_stats"))
 async def show_statistics(callback: types.CallbackQuery, postgres_db: PostgresDatabase):
+    days = int(callback.data.rsplit("_", 1)[1]) if callback.data != "admin_stats" else 30
     try:
         async with postgres_db.session_scope() as session:
             crud = RoomCRUD(session)
-            stats = await crud.get_rooms_statistics()
+            end = datetime.now().date() + timedelta(days=1)
+            stats = await crud.get_rooms_statistics(end - timedelta(days=days), end)
             
+            updated_at = stats["updated_at"].astimezone().strftime("%d.%m %H:%M") if stats["updated_at"] else "—"
             text = (
-                "📊 Статистика за последние 30 дней:\n\n"
+                f"📊 Статистика за последние {days} дней:\n\n"
                 f"💰 Общий доход: {stats['total_income']:.2f}₽\n"
                 f"📅 Всего бронирований: {stats['total_bookings']}\n"
+                f"❌ Отмен: {stats['cancellations']}\n"
+                f"🛏 Занято ночей: {stats['room_nights']} ({stats['occupancy']:.0%})\n"
                 f"🏨 Всего номеров: {stats['total_rooms']}\n"
                 f"✅ Свободно: {stats['available_rooms']}\n"
-                f"⛔ Занято: {stats['total_rooms'] - stats['available_rooms']}"
+                f"⛔ Занято: {stats['total_rooms'] - stats['available_rooms']}\n\n"
+                f"🕒 Данные на {updated_at}"
             )
+
+            builder = InlineKeyboardBuilder()
+            for window in STATS_WINDOWS:
+                label = f"• {window} дн. •" if window == days else f"{window} дн."
+                builder.button(text=label, callback_data=f"admin_stats_{window}")
+            builder.button(text="🔙 Назад", callback_data="admin_menu")
+            builder.adjust(len(STATS_WINDOWS), 1)
             
-            await callback.message.edit_text(
-                text,
-                reply_markup=InlineKeyboardBuilder()
-                    .button(text="🔙 Назад", callback_data="admin_menu")
-                    .as_markup()
-            )
+            await callback.message.edit_text(text, reply_markup=builder.as_markup())
             
     except Exception as e:
         logging.error(f"Ошибка статистики: {str(e)}")
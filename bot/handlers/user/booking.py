@@ -4,14 +4,13 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import datetime
+from config.config import config
 
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
-from models.postgres_models import Booking
-from keyboards.user import main_keyboard, back_keyboard
+from keyboards.user import main_keyboard, back_keyboard, rooms_keyboard
 from services.postgres_crud.room_crud import RoomCRUD
 from services.postgres_crud.booking_crud import BookingCRUD
 from services.postgres_crud.user_crud import UserCRUD
+from services.scheduler import BackgroundScheduler
 from aiogram.fsm.state import State, StatesGroup
 
 class BookingFSM(StatesGroup):
@@ -21,7 +20,9 @@ class BookingFSM(StatesGroup):
     choosing_booking_to_pay = State()
     choosing_payment_method = State()
     
-booking_router = Router()
+booking_router = Router(name="booking_router")
+
+PAGE_SIZE = 5
 
 @booking_router.message(F.text == "↩️ Главное меню")
 async def back_to_main_menu(message: Message, state: FSMContext):
@@ -68,80 +69,39 @@ async def choose_dates(message: Message, state: FSMContext, **kwargs):
     if date <= check_in:
         await message.answer("❗ Дата выезда должна быть позже даты заезда", reply_markup=back_keyboard())
         return
+    if (date - check_in).days > config.BOOKING_MAX_NIGHTS:
+        await message.answer(
+            f"❗ Максимальный срок проживания — {config.BOOKING_MAX_NIGHTS} ночей",
+            reply_markup=back_keyboard()
+        )
+        return
 
     room_crud = RoomCRUD(session)
-    available_rooms = await room_crud.get_available_rooms(check_in, date)
+    room_ids = await room_crud.get_available_room_ids(check_in, date)
 
-    if not available_rooms:
+    if not room_ids:
         await message.answer("😕 Нет доступных номеров на выбранные даты", reply_markup=back_keyboard())
         await state.clear()
         return
 
-    PER_PAGE = 5
-    
-    total_pages = max((len(available_rooms) + PER_PAGE - 1) // PER_PAGE, 1)
+    total_pages = max((len(room_ids) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
     current_page = max(1, min(current_page, total_pages))
-    page_rooms = available_rooms[(current_page-1)*PER_PAGE : current_page*PER_PAGE]
-
-    builder = InlineKeyboardBuilder()
-    
-    for room in page_rooms:
-        builder.row(InlineKeyboardButton(
-            text=f"🏨 {room.human_name} | 💰{room.price}₽/ночь | 👥{room.capacity} чел.",
-            callback_data=f"select_{room.id}"
-        ))
-
-    if total_pages > 1:
-        nav_buttons = []
-        if current_page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data="prev_page"))
-        nav_buttons.append(InlineKeyboardButton(text=f"{current_page}/{total_pages}", callback_data="ignore"))
-        if current_page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data="next_page"))
-        builder.row(*nav_buttons)
-
-    builder.row(InlineKeyboardButton(
-        text="❌ Отменить бронирование", 
-        callback_data="cancel_booking"
-    ))
+    page_rooms = await room_crud.get_rooms_by_ids(page_room_ids(room_ids, current_page))
 
     await state.update_data(
         check_out=date,
-        all_rooms=[r.id for r in available_rooms],
         page=current_page,
         total_pages=total_pages
     )
 
     await message.answer(
         f"🏨 Страница {current_page}/{total_pages}. Выберите номер:",
-        reply_markup=builder.as_markup()
+        reply_markup=rooms_keyboard(page_rooms, current_page, total_pages)
     )
     await state.set_state(BookingFSM.selecting_room)
 
-async def build_rooms_keyboard(available_rooms: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
-    builder = InlineKeyboardBuilder()
-    
-    for room in available_rooms:
-        builder.row(InlineKeyboardButton(
-            text=f"🏨 {room.human_name} | 💰{room.price}₽/ночь | 👥{room.capacity} чел.",
-            callback_data=f"select_{room.id}"
-        ))
-
-    if total_pages > 1:
-        nav_buttons = []
-        if current_page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data="prev_page"))
-        nav_buttons.append(InlineKeyboardButton(text=f"{current_page}/{total_pages}", callback_data="ignore"))
-        if current_page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data="next_page"))
-        builder.row(*nav_buttons)
-
-    builder.row(InlineKeyboardButton(
-        text="❌ Отменить бронирование", 
-        callback_data="cancel_booking"
-    ))
-    
-    return builder.as_markup()
+def page_room_ids(room_ids, page: int) -> list[int]:
+    return list(room_ids[(page - 1) * PAGE_SIZE : page * PAGE_SIZE])
 
 @booking_router.callback_query(F.data.in_(["prev_page", "next_page"]), BookingFSM.selecting_room)
 async def handle_pagination(callback: CallbackQuery, state: FSMContext, session):
@@ -155,17 +115,13 @@ async def handle_pagination(callback: CallbackQuery, state: FSMContext, session)
         current_page += 1
 
     room_crud = RoomCRUD(session)
-    available_rooms = await room_crud.get_available_rooms(
-        data["check_in"], 
-        data["check_out"]
-    )
-    
-    PER_PAGE = 5
-    total_pages = max((len(available_rooms) + PER_PAGE - 1) // PER_PAGE, 1)
+    room_ids = await room_crud.get_available_room_ids(data["check_in"], data["check_out"])
+
+    total_pages = max((len(room_ids) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
     current_page = max(1, min(current_page, total_pages))
-    page_rooms = available_rooms[(current_page-1)*PER_PAGE : current_page*PER_PAGE]
+    page_rooms = await room_crud.get_rooms_by_ids(page_room_ids(room_ids, current_page))
 
-    keyboard = await build_rooms_keyboard(
+    keyboard = rooms_keyboard(
         page_rooms, 
         current_page, 
         total_pages
@@ -199,22 +155,18 @@ async def cancel_handler(message: Message, state: FSMContext):
     await message.answer("❌ Бронирование отменено.", reply_markup=main_keyboard())
     
 @booking_router.callback_query(F.data == "confirm_booking")
-async def confirm_booking(callback: CallbackQuery, state: FSMContext, session):
+async def confirm_booking(callback: CallbackQuery, state: FSMContext, session, scheduler: BackgroundScheduler):
     data = await state.get_data()
     
     user_crud = UserCRUD(session)
     booking_crud = BookingCRUD(session)
     room_crud = RoomCRUD(session)
     
-    logging.info(f"Поиск пользователя: {callback.from_user.id}")
-    user = await user_crud.get_user_by_telegram_id(callback.from_user.id)
-    logging.info(f"Результат: {user}")
-    if not user:
-        user = await user_crud.create_user(
-            telegram_id=callback.from_user.id,
-            name=callback.from_user.first_name or "Неизвестный",
-            surname=callback.from_user.last_name or "Пользователь"
-        )
+    user_id = await user_crud.get_or_create_user_id(
+        telegram_id=callback.from_user.id,
+        name=callback.from_user.first_name or "Неизвестный",
+        surname=callback.from_user.last_name or "Пользователь"
+    )
 
     room = await room_crud.get_room_by_id(data["selected_room"])
     if not room:
@@ -224,16 +176,21 @@ async def confirm_booking(callback: CallbackQuery, state: FSMContext, session):
     days = (data["check_out"] - data["check_in"]).days
     total_price = room.price * days
 
-    booking = await booking_crud.create_booking(
+    booking_id = await booking_crud.reserve(
         total_price=total_price,
-        user_id=user.id,
+        user_id=user_id,
         room_id=room.id,
         check_in=data["check_in"],
         check_out=data["check_out"]
     )
+    if booking_id is None:
+        await callback.message.edit_text("😕 Этот номер уже забронирован на выбранные даты. Попробуйте другой.")
+        await callback.message.answer("Вы вернулись в главное меню.", reply_markup=main_keyboard())
+        await state.clear()
+        return
 
-    await room_crud.refresh_rooms_availability()
-    await room_crud.auto_update_statuses()
+    await session.commit()
+    scheduler.request_room_refresh(room.id)
 
     check_in_str = data["check_in"].strftime("%d.%m.%Y")
     check_out_str = data["check_out"].strftime("%d.%m.%Y")
@@ -281,32 +238,24 @@ async def cancel_booking_callback(callback: CallbackQuery, state: FSMContext):
 @booking_router.message(F.text == "💳 Оплатить бронь")
 async def pay_booking_start(message: Message, state: FSMContext, session):
     user_crud = UserCRUD(session)
-    user = await user_crud.get_user_by_telegram_id(message.from_user.id)
-    if not user:
+    user_id = await user_crud.get_user_id_by_telegram_id(message.from_user.id)
+    if user_id is None:
         await message.answer("❌ Вы не зарегистрированы в системе.", reply_markup=main_keyboard())
         return
 
     booking_crud = BookingCRUD(session)
-    bookings = await booking_crud.get_unpaid_bookings_by_user_id(user.id)
+    bookings = await booking_crud.list_unpaid_bookings(user_id)
 
     if not bookings:
         await message.answer("💳 У вас нет броней для оплаты.", reply_markup=main_keyboard())
         return
 
-    stmt = (
-        select(Booking)
-        .where(Booking.user_id == user.id)
-        .options(joinedload(Booking.room))  
-    )
-    result = await session.execute(stmt)
-    bookings = result.unique().scalars().all()
-
     builder = InlineKeyboardBuilder()
     for b in bookings:
         check_in = b.check_in.strftime("%d.%m.%Y")
         check_out = b.check_out.strftime("%d.%m.%Y")
         builder.button(
-            text=f"№{b.id}: {b.room.human_name} с {check_in} по {check_out} — {b.total_price}₽",
+            text=f"№{b.id}: {b.room_name} с {check_in} по {check_out} — {b.total_price}₽",
             callback_data=f"pay_{b.id}"
         )
     builder.button(text="↩️ Главное меню", callback_data="pay_back")
@@ -336,7 +285,10 @@ async def pay_booking_method_selected(callback: CallbackQuery, state: FSMContext
     payment_method = callback.data.split("_")[1]
 
     booking_crud = BookingCRUD(session)
-    await booking_crud.mark_as_paid(booking_id)
+    if not await booking_crud.mark_as_paid(booking_id):
+        await callback.message.edit_text(f"❌ Бронь №{booking_id} не найдена.", reply_markup=None)
+        await state.clear()
+        return
 
     await callback.message.edit_text(
         f"✅ Оплата брони №{booking_id} успешно проведена через {payment_method.capitalize()}!\n"
@@ -357,13 +309,13 @@ async def pay_cancel(callback: CallbackQuery, state: FSMContext):
 @booking_router.message(F.text == "❌ Отменить бронь")
 async def cancel_booking_start(message: Message, state: FSMContext, session):
     user_crud = UserCRUD(session)
-    user = await user_crud.get_user_by_telegram_id(message.from_user.id)
-    if not user:
+    user_id = await user_crud.get_user_id_by_telegram_id(message.from_user.id)
+    if user_id is None:
         await message.answer("❌ Вы не зарегистрированы в системе.", reply_markup=main_keyboard())
         return
 
     booking_crud = BookingCRUD(session)
-    bookings = await booking_crud.get_active_bookings_by_user_id(user.id)  
+    bookings = await booking_crud.list_active_bookings(user_id)
 
     if not bookings:
         await message.answer("❌ У вас нет активных бронирований для отмены.", reply_markup=main_keyboard())
@@ -374,7 +326,7 @@ async def cancel_booking_start(message: Message, state: FSMContext, session):
         check_in = b.check_in.strftime("%d.%m.%Y")
         check_out = b.check_out.strftime("%d.%m.%Y")
         builder.button(
-            text=f"№{b.id}: {b.room.human_name} с {check_in} по {check_out} (Отменить)",
+            text=f"№{b.id}: {b.room_name} с {check_in} по {check_out} (Отменить)",
             callback_data=f"cancel_{b.id}"
         )
     builder.button(text="↩️ Главное меню", callback_data="cancel_back")
@@ -382,11 +334,16 @@ async def cancel_booking_start(message: Message, state: FSMContext, session):
     await state.set_state(BookingFSM.choosing_booking_to_pay)
 
 @booking_router.callback_query(F.data.startswith("cancel_"))
-async def cancel_booking_confirm(callback: CallbackQuery, state: FSMContext, session):
+async def cancel_booking_confirm(callback: CallbackQuery, state: FSMContext, session, scheduler: BackgroundScheduler):
     try:
         booking_id = int(callback.data.split("_")[1])
         booking_crud = BookingCRUD(session)
-        await booking_crud.cancel_booking(booking_id)
+        cancelled = await booking_crud.cancel_booking(booking_id)
+        if not cancelled:
+            await callback.message.edit_text(f"❌ Бронь №{booking_id} не найдена.", reply_markup=None)
+            await state.clear()
+            return
+        scheduler.request_room_refresh(cancelled.room_id)
         await callback.message.edit_text(
             "✅ Бронирование отменено.",
             reply_markup=None  
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
@@ -6,13 +7,18 @@ from aiogram.utils.keyboard import ReplyKeyboardBuilder
 from services.mongo_database import MongoDatabase
 from models.mongo_models import Review
 from keyboards.user import main_keyboard
+from keyboards.registry import keyboard_registry
 
-feedback_router = Router()
+feedback_router = Router(name="feedback_router")
+
+# The loop only keeps weak references to tasks; this keeps pending failure notices alive until sent
+_notices: set[asyncio.Task] = set()
 
 class FeedbackStates(StatesGroup):
     waiting_for_review = State()
     waiting_for_rating = State()
 
+@keyboard_registry.static
 def back_keyboard():
     builder = ReplyKeyboardBuilder()
     builder.button(text="↩️ Отмена")
@@ -52,6 +58,15 @@ async def cancel_rating(message: types.Message, state: FSMContext):
         reply_markup=main_keyboard()
     )
 
+def notify_if_not_saved(message: types.Message):
+    def callback(confirmation: asyncio.Future):
+        # Cancelled at shutdown: the outcome is unknown, so stay quiet rather than raise in the callback
+        if not confirmation.cancelled() and not confirmation.result():
+            task = asyncio.create_task(message.answer("❌ Ошибка сохранения отзыва. Попробуйте позже."))
+            _notices.add(task)
+            task.add_done_callback(_notices.discard)
+    return callback
+
 @feedback_router.message(FeedbackStates.waiting_for_rating)
 async def process_rating(message: types.Message, state: FSMContext, mongo_db: MongoDatabase):
     try:
@@ -66,13 +81,9 @@ async def process_rating(message: types.Message, state: FSMContext, mongo_db: Mo
                 rating=rating
             )
             
-            collection = mongo_db.get_reviews_collection()
-            result = await collection.insert_one(review.model_dump())
-            
-            if result.acknowledged:
-                await message.answer("✅ Спасибо за отзыв!", reply_markup=main_keyboard())
-            else:
-                await message.answer("❌ Ошибка сохранения", reply_markup=main_keyboard())
+            confirmation = mongo_db.buffer_review(review)
+            confirmation.add_done_callback(notify_if_not_saved(message))
+            await message.answer("✅ Спасибо за отзыв!", reply_markup=main_keyboard())
             
             await state.clear()
         else:
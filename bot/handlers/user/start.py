@@ -1,11 +1,14 @@
+import logging
 from aiogram import F, Router, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from services.postgres_crud.user_crud import UserCRUD
+from services.mongo_crud.review_crud import ReviewCRUD
+from services.mongo_database import MongoDatabase
 from keyboards.user import main_keyboard
 
-start_router = Router()
+start_router = Router(name="start_router")
 
 class Registration(StatesGroup):
     waiting_for_name = State()
@@ -13,17 +16,27 @@ class Registration(StatesGroup):
 
 
 @start_router.message(Command("start"))
-async def cmd_start(message: types.Message, state: FSMContext, session):
+async def cmd_start(message: types.Message, state: FSMContext, session, mongo_db: MongoDatabase):
     user_crud = UserCRUD(session)
-    await user_crud.get_or_create_user(
+    await user_crud.get_or_create_user_id(
         telegram_id=message.from_user.id,
         name=message.from_user.first_name,
         surname=message.from_user.last_name or ""
     )
+    await session.commit()
+
+    rating = ""
+    try:
+        summary = await ReviewCRUD(mongo_db.get_reviews_collection()).get_rating_summary()
+        if summary["count"]:
+            rating = f"⭐ Рейтинг отеля: <b>{summary['average']:.1f}/10</b> (отзывов: {summary['count']})\n\n"
+    except Exception as e:
+        logging.error(f"Ошибка загрузки рейтинга: {str(e)}")
     
     await state.clear()
     await message.answer(
         "🏨 Добро пожаловать в <b>Luxury Hotel Bot</b>!\n\n"
+        f"{rating}"
         "Здесь вы можете:\n"
         "• 🛌 Забронировать номер\n"
         "• 📝 Оставить отзыв\n\n"
@@ -46,11 +59,13 @@ async def process_surname(message: types.Message, state: FSMContext, session):
     surname = message.text
 
     user_crud = UserCRUD(session)
-    user = await user_crud.get_or_create_user(
+    await user_crud.upsert_user(
         telegram_id=message.from_user.id,
         name=name,
-        surname=surname
+        surname=surname,
+        update_profile=True
     )
+    await session.commit()
 
     await state.clear()
     await message.answer(
@@ -1,6 +1,8 @@
 from aiogram import types
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from keyboards.registry import keyboard_registry
 
+@keyboard_registry.static
 def admin_panel_keyboard():
     return InlineKeyboardBuilder().add(
         types.InlineKeyboardButton(text="🏠 Номера", callback_data="rooms_management"),
@@ -8,6 +10,7 @@ def admin_panel_keyboard():
         types.InlineKeyboardButton(text="📝 Отзывы", callback_data="admin_reviews")
     ).adjust(2).as_markup()
 
+@keyboard_registry.static
 def rooms_management_keyboard():
     return InlineKeyboardBuilder().add(
         types.InlineKeyboardButton(text="📋 Список номеров", callback_data="rooms_list"),
@@ -0,0 +1,41 @@
+import functools
+from typing import Callable, Hashable
+from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
+from config.config import config
+from services.cache import TTLCache
+
+Markup = InlineKeyboardMarkup | ReplyKeyboardMarkup
+
+
+# Markups handed out here are shared by every reply that asks for them. aiogram markups are mutable
+# models, so callers must never modify one in place; model_copy() it first if it needs editing
+class KeyboardRegistry:
+    def __init__(self, maxsize: int):
+        self._static: dict[str, Markup] = {}
+        self._pages = TTLCache(maxsize)
+
+    def static(self, build: Callable[[], Markup]) -> Callable[[], Markup]:
+        name = f"{build.__module__}.{build.__qualname__}"
+
+        @functools.wraps(build)
+        def cached() -> Markup:
+            markup = self._static.get(name)
+            if markup is None:
+                markup = self._static[name] = build()
+            return markup
+
+        return cached
+
+    def page(self, key: Hashable, build: Callable[[], Markup]) -> Markup:
+        markup = self._pages.get(key)
+        if markup is None:
+            markup = build()
+            self._pages.set(key, markup)
+        return markup
+
+    def clear(self):
+        self._static.clear()
+        self._pages.clear()
+
+
+keyboard_registry = KeyboardRegistry(maxsize=config.KEYBOARD_CACHE_SIZE)
@@ -1,5 +1,8 @@
-from aiogram.utils.keyboard import ReplyKeyboardBuilder
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
+from keyboards.registry import keyboard_registry
 
+@keyboard_registry.static
 def main_keyboard():
     builder = ReplyKeyboardBuilder()
     buttons = [
@@ -21,7 +24,40 @@ def main_keyboard():
         input_field_placeholder="Выберите действие..."
     )
 
+@keyboard_registry.static
 def back_keyboard():
     builder = ReplyKeyboardBuilder()
     builder.button(text="↩️ Главное меню")
     return builder.as_markup(resize_keyboard=True)
+
+def rooms_keyboard(rooms: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    # Snapshots are part of the key, so a changed price or name never hits a stale page
+    return keyboard_registry.page(
+        (tuple(rooms), current_page, total_pages),
+        lambda: build_rooms_keyboard(rooms, current_page, total_pages)
+    )
+
+def build_rooms_keyboard(rooms: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    
+    for room in rooms:
+        builder.row(InlineKeyboardButton(
+            text=f"🏨 {room.human_name} | 💰{room.price}₽/ночь | 👥{room.capacity} чел.",
+            callback_data=f"select_{room.id}"
+        ))
+
+    if total_pages > 1:
+        nav_buttons = []
+        if current_page > 1:
+            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data="prev_page"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{current_page}/{total_pages}", callback_data="ignore"))
+        if current_page < total_pages:
+            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data="next_page"))
+        builder.row(*nav_buttons)
+
+    builder.row(InlineKeyboardButton(
+        text="❌ Отменить бронирование", 
+        callback_data="cancel_booking"
+    ))
+    
+    return builder.as_markup()
@@ -1,11 +1,22 @@
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 import logging
 
 from services.postgres_crud.room_crud import create_initial_rooms
+from services.availability_index import availability_index
+from services.booking_partitions import stay_bound
+from services.room_catalog import room_catalog
+from services.fsm_storage import PostgresStorage
+from services.migrations import run_migrations
+from services.mongo_crud.review_crud import ReviewCRUD
+from services.metrics import metrics, start_metrics_server
 from services.mongo_database import MongoDatabase
 from services.postgres_database import PostgresDatabase
+from services.scheduler import BackgroundScheduler
+from services.webhook import run_webhook
 from config.config import config
 from handlers.user.start import start_router
 from handlers.user.booking import booking_router
@@ -14,6 +25,9 @@ from handlers.admin.reviews import reviews_router
 from handlers.admin.rooms import admin_rooms_router
 from handlers.user.feedback import feedback_router
 from middlewares.db_session import DBSessionMiddleware
+from middlewares.fsm_write_buffer import FSMWriteBufferMiddleware
+from middlewares.metrics import MetricsMiddleware
+from middlewares.throttling import ThrottlingMiddleware
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,42 +38,150 @@ logging.basicConfig(
     ]
 )
 
+def create_dispatcher(
+    postgres_db: PostgresDatabase,
+    mongo_db: MongoDatabase,
+    scheduler: BackgroundScheduler
+) -> Dispatcher:
+    if config.FSM_STORAGE == "postgres":
+        storage = PostgresStorage(postgres_db, ttl=config.FSM_TTL)
+        scheduler.add_job("fsm_purge", storage.purge_expired, config.FSM_PURGE_INTERVAL)
+    else:
+        storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
+
+    # Suppressed updates must not even load FSM state, so throttling goes in front of the FSM middleware
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(ThrottlingMiddleware(
+        rate=config.THROTTLE_RATE,
+        burst=config.THROTTLE_BURST,
+        dedup=config.CALLBACK_DEDUP
+    ))
+    # The buffer wraps the FSM middleware too, so its state read fills the buffer the handler reads from
+    if isinstance(storage, PostgresStorage):
+        dp.update.outer_middleware(FSMWriteBufferMiddleware(storage))
+    dp.update.outer_middleware(dp.fsm)
+
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+    dp.message.middleware(DBSessionMiddleware(postgres_db.async_session_maker))
+    dp.callback_query.middleware(DBSessionMiddleware(postgres_db.async_session_maker))
+
+    dp.include_router(start_router)
+    dp.include_router(auth_router)
+    dp.include_router(feedback_router)
+    dp.include_router(reviews_router)
+    dp.include_router(booking_router)
+    dp.include_router(admin_rooms_router)
+
+    dp["postgres_db"] = postgres_db
+    dp["mongo_db"] = mongo_db
+    dp["scheduler"] = scheduler
+    return dp
+
+class StartupReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def log(self):
+        total = time.perf_counter() - self.started
+        # Phases run concurrently, so they add up to more than the wall time
+        details = ", ".join(f"{name} {elapsed * 1000:.0f} ms" for name, elapsed in self.phases)
+        logging.info(f"Startup finished in {total * 1000:.0f} ms: {details}")
+
+async def init_backends(postgres_db: PostgresDatabase, mongo_db: MongoDatabase):
+    report = StartupReport()
+
+    async def init_mongo():
+        async with report.phase("mongo.connect"):
+            await mongo_db.connect()
+
+        async def review_stats():
+            async with report.phase("mongo.review_stats"):
+                await ReviewCRUD(mongo_db.get_reviews_collection()).ensure_stats()
+
+        async def indexes():
+            async with report.phase("mongo.indexes"):
+                await mongo_db.init_indexes()
+
+        await asyncio.gather(indexes(), review_stats())
+
+    async def init_postgres():
+        async with report.phase("postgres.migrate"):
+            await run_migrations(postgres_db.engine)
+        async with report.phase("postgres.seed"), postgres_db.session_scope() as session:
+            await create_initial_rooms(session)
+
+        async def load_index():
+            async with report.phase("availability_index"), postgres_db.session_scope() as session:
+                await availability_index.load(session)
+
+        async def load_catalog():
+            async with report.phase("room_catalog"), postgres_db.session_scope() as session:
+                await room_catalog.ensure_loaded(session)
+
+        async with report.phase("stay_bound"), postgres_db.session_scope() as session:
+            await stay_bound.load(session)
+        await asyncio.gather(load_index(), load_catalog())
+
+    await asyncio.gather(init_mongo(), init_postgres())
+    report.log()
+
 async def main():
     logging.basicConfig(level=logging.INFO)
     
     bot = Bot(token=config.BOT_TOKEN.get_secret_value())
-    dp = Dispatcher(storage=MemoryStorage())
 
     postgres_db = PostgresDatabase()
     mongo_db = MongoDatabase()
+    scheduler = BackgroundScheduler(postgres_db)
+
+    async def log_pool_stats():
+        logging.info(f"Postgres pool: {postgres_db.pool_stats()}")
+        logging.info(f"MongoDB pool: {mongo_db.pool_stats()}")
+
+    async def log_metrics_summary():
+        metrics.log_summary()
+
+    if config.POOL_STATS_LOG_INTERVAL:
+        scheduler.add_job("pool_stats", log_pool_stats, config.POOL_STATS_LOG_INTERVAL)
+    if config.METRICS_LOG_INTERVAL:
+        scheduler.add_job("metrics_summary", log_metrics_summary, config.METRICS_LOG_INTERVAL)
+
+    metrics.register_gauges("postgres", postgres_db.pool_stats)
+    metrics.register_gauges("mongo", mongo_db.pool_stats)
+
+    dp = create_dispatcher(postgres_db, mongo_db, scheduler)
+    metrics_runner = None
     
     try:
-        await mongo_db.connect()
-        await mongo_db.init_indexes()
-        await postgres_db.create_tables()
-        
-        dp.message.middleware(DBSessionMiddleware(postgres_db.async_session_maker))
-        dp.callback_query.middleware(DBSessionMiddleware(postgres_db.async_session_maker))
-        
-        async with postgres_db.session_scope() as session:
-            await create_initial_rooms(session)
-        
-        dp.include_router(start_router)
-        dp.include_router(auth_router)
-        dp.include_router(feedback_router)
-        dp.include_router(reviews_router)
-        dp.include_router(booking_router)
-        dp.include_router(admin_rooms_router)
-
-        dp["postgres_db"] = postgres_db
-        dp["mongo_db"] = mongo_db
-        
-        
-
-        await dp.start_polling(bot)
+        await init_backends(postgres_db, mongo_db)
+
+        scheduler.start()
+        if config.METRICS_PORT:
+            metrics_runner = await start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+
+        if config.RUN_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # Telegram rejects getUpdates while a webhook from an earlier webhook-mode run is still set
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     finally:
+        await scheduler.stop()
+        await mongo_db.close()
+        if metrics_runner:
+            await metrics_runner.cleanup()
         await bot.session.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
-
@@ -0,0 +1,17 @@
+from aiogram import BaseMiddleware
+from typing import Callable, Awaitable, Any, Dict
+from aiogram.types import TelegramObject
+from services.fsm_storage import PostgresStorage
+
+class FSMWriteBufferMiddleware(BaseMiddleware):
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.storage.buffered():
+            return await handler(event, data)
@@ -0,0 +1,29 @@
+import time
+from aiogram import BaseMiddleware
+from typing import Callable, Awaitable, Any, Dict
+from aiogram.types import TelegramObject
+from services.metrics import metrics
+
+class MetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        token = metrics.start_update()
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            metrics.finish_update(
+                token,
+                router=data["event_router"].name,
+                handler=data["handler"].callback.__name__,
+                duration=time.perf_counter() - started,
+                failed=failed
+            )
@@ -0,0 +1,67 @@
+import time
+from aiogram import BaseMiddleware
+from typing import Callable, Awaitable, Any, Dict, Hashable
+from aiogram.types import CallbackQuery, TelegramObject, Update
+from services.cache import TTLCache
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    def __init__(self, rate: float, burst: int, dedup: bool = True, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.dedup = dedup
+        # An idle bucket refills completely within burst / rate seconds, so expiring it then loses nothing
+        self._buckets = TTLCache(maxsize, ttl=burst / rate) if rate > 0 else None
+        # Taps whose first press is still being handled; a finished tap frees its key, so quick
+        # page flips on a message edited in place are never mistaken for a double tap
+        self._in_flight: set[Hashable] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        callback = event.callback_query
+        key = self._tap_key(callback) if callback is not None else None
+        if key is not None and key in self._in_flight:
+            await data["bot"].answer_callback_query(callback.id)
+            return None
+
+        if not self._take_token(user.id):
+            if callback is not None:
+                await data["bot"].answer_callback_query(callback.id, "⏳ Слишком часто, подождите немного")
+            return None
+
+        if key is None:
+            return await handler(event, data)
+        self._in_flight.add(key)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(key)
+
+    def _tap_key(self, callback: CallbackQuery) -> Hashable | None:
+        if not self.dedup or callback.data is None:
+            return None
+        if callback.message is not None:
+            target = (callback.message.chat.id, callback.message.message_id)
+        else:
+            target = callback.inline_message_id
+        return callback.from_user.id, target, callback.data
+
+    def _take_token(self, user_id: int) -> bool:
+        if self._buckets is None:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets.set(user_id, (tokens, now))
+            return False
+        self._buckets.set(user_id, (tokens - 1, now))
+        return True
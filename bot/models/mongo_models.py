@@ -7,6 +7,6 @@ class Review(BaseModel):
     user_name: Optional[str] = None
     text: str
     rating: int = Field(ge=0, le=10)
-    created_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
     is_approved: bool = False
     admin_comment: Optional[str] = None
\ No newline at end of file
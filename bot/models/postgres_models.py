@@ -1,6 +1,6 @@
 from enum import Enum
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Numeric
-from sqlalchemy import Enum as SQLAlchemyEnum
+from sqlalchemy import Boolean, Column, Date, Integer, LargeBinary, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Enum as SQLAlchemyEnum, Index, Sequence, column, func, literal_column
 from sqlalchemy.orm import relationship
 from services.postgres_database import Base
 from datetime import datetime
@@ -56,14 +56,24 @@ class Room(Base):
     bookings = relationship("Booking", back_populates="room")
 
 
+def stay_range(start, end):
+    # Half-open like reserve's overlap check, so a checkout day is free for the next check-in.
+    # Bounds are inlined so queries repeat the exact expression of ix_bookings_stay_range
+    return func.tsrange(start, end, literal_column("'[)'"))
+
+
+BOOKING_ID_SEQ = Sequence("bookings_id_seq")
+
+
 class Booking(Base):
     __tablename__ = "bookings"
     
-    id = Column(Integer, primary_key=True)
+    # Partitioned by check_in month, and Postgres wants the partition key in the primary key
+    id = Column(Integer, BOOKING_ID_SEQ, server_default=BOOKING_ID_SEQ.next_value(), primary_key=True)
     total_price = Column(Numeric(10, 2))
     user_id = Column(Integer, ForeignKey("users.id"))
     room_id = Column(Integer, ForeignKey("rooms.id"))
-    check_in = Column(DateTime)
+    check_in = Column(DateTime, primary_key=True)
     check_out = Column(DateTime)
     status = Column(
         SQLAlchemyEnum(BookingStatusEnum, values_callable=lambda x: [e.value for e in x]),
@@ -72,6 +82,54 @@ class Booking(Base):
         index=True,
     )
     paid = Column(Boolean, default=False, nullable=False)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        index=True,
+    )
+    cancelled_at = Column(DateTime(timezone=True), index=True)
 
     user = relationship("User", back_populates="bookings")
     room = relationship("Room", back_populates="bookings", lazy="joined")
+
+    # Exclusion constraints cannot span partitions; BookingCRUD.reserve serializes per room instead
+    __table_args__ = (
+        Index("ix_bookings_user_status_check_out", "user_id", "status", "check_out"),
+        Index("ix_bookings_room_status_check_out", "room_id", "status", "check_out"),
+        Index("ix_bookings_check_out", "check_out"),
+        Index(
+            "ix_bookings_stay_range",
+            stay_range(column("check_in"), column("check_out")),
+            postgresql_using="gist",
+        ),
+        {"postgresql_partition_by": "RANGE (check_in)"},
+    )
+
+
+class FSMState(Base):
+    __tablename__ = "fsm_states"
+
+    key = Column(String(255), primary_key=True)
+    state = Column(String(255))
+    data = Column(LargeBinary)
+    updated_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class BookingDailyStats(Base):
+    __tablename__ = "booking_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    cancellations = Column(Integer, nullable=False, default=0)
+    room_nights = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(64), primary_key=True)
+    processed_until = Column(DateTime(timezone=True), nullable=False)
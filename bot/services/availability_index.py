@@ -0,0 +1,88 @@
+import bisect
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.postgres_models import Booking, BookingStatusEnum, Room, RoomStatusEnum
+from services.booking_partitions import earliest_check_in
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self.loaded = False
+        self._room_ids: list[int] = []
+        self._room_status: dict[int, RoomStatusEnum] = {}
+        # room_id -> [(check_in, check_out, booking_id)], sorted by check_in
+        self._intervals: dict[int, list[tuple[datetime, datetime, int]]] = {}
+        self._booking_rooms: dict[int, int] = {}
+
+    async def load(self, session: AsyncSession):
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        rooms = await session.execute(select(Room.id, Room.status))
+        bookings = await session.execute(
+            select(Booking.id, Booking.room_id, Booking.check_in, Booking.check_out).where(
+                Booking.status != BookingStatusEnum.CANCELLED,
+                Booking.check_out >= today,
+                Booking.check_in >= earliest_check_in(today)
+            )
+        )
+
+        self._room_ids = []
+        self._room_status = {}
+        self._intervals = {}
+        self._booking_rooms = {}
+        for room_id, status in rooms:
+            self.set_room_status(room_id, status)
+        for booking_id, room_id, check_in, check_out in bookings:
+            self.add_booking(booking_id, room_id, check_in, check_out)
+
+        # Periodic reloads would flood the log; only the startup load is worth a line
+        log = logging.debug if self.loaded else logging.info
+        self.loaded = True
+        log(
+            f"Availability index loaded: {len(self._room_ids)} rooms, "
+            f"{len(self._booking_rooms)} bookings"
+        )
+
+    def set_room_status(self, room_id: int, status: RoomStatusEnum):
+        if room_id not in self._room_status:
+            bisect.insort(self._room_ids, room_id)
+        self._room_status[room_id] = status
+
+    def update_room_statuses(self, statuses: dict[int, RoomStatusEnum]):
+        for room_id, status in statuses.items():
+            self.set_room_status(room_id, status)
+
+    def add_booking(self, booking_id: int, room_id: int, check_in: datetime, check_out: datetime):
+        self.remove_booking(booking_id)
+        bisect.insort(
+            self._intervals.setdefault(room_id, []),
+            (check_in, check_out, booking_id),
+            key=lambda interval: interval[0]
+        )
+        self._booking_rooms[booking_id] = room_id
+
+    def remove_booking(self, booking_id: int):
+        room_id = self._booking_rooms.pop(booking_id, None)
+        if room_id is None:
+            return
+        intervals = self._intervals[room_id]
+        intervals[:] = [interval for interval in intervals if interval[2] != booking_id]
+
+    def is_room_free(self, room_id: int, check_in: datetime, check_out: datetime) -> bool:
+        intervals = self._intervals.get(room_id)
+        if not intervals:
+            return True
+        # Same half-open rule as reserve and the SQL query: check_in < out and check_out > in
+        end = bisect.bisect_left(intervals, check_out, key=lambda interval: interval[0])
+        return not any(interval[1] > check_in for interval in intervals[:end])
+
+    def get_available_room_ids(self, check_in: datetime, check_out: datetime) -> list[int]:
+        return [
+            room_id for room_id in self._room_ids
+            if self._room_status[room_id] == RoomStatusEnum.AVAILABLE
+            and self.is_room_free(room_id, check_in, check_out)
+        ]
+
+
+availability_index = AvailabilityIndex()
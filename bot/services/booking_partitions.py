@@ -0,0 +1,272 @@
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config.config import config
+from models.postgres_models import Booking, BookingStatusEnum
+
+PARTITION_LOCK_ID = 7_311_003
+DEFAULT_PARTITION = "bookings_default"
+LOCK_TIMEOUT = "5s"
+# Rows changed this soon before the archive copy are copied again when it is swapped in
+CATCH_UP_MARGIN = timedelta(minutes=10)
+COLUMNS = ", ".join(column.name for column in Booking.__table__.columns)
+
+# New stays are capped at this length; BookingCRUD refuses anything longer
+MAX_STAY = timedelta(days=config.BOOKING_MAX_NIGHTS)
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: date | None
+    end: date | None
+
+    @property
+    def monthly(self) -> bool:
+        return self.start is not None and add_months(self.start, 1) == self.end
+
+
+class StayBound:
+    def __init__(self, cap: timedelta):
+        self.cap = cap
+        self.longest = cap
+
+    async def load(self, conn):
+        # Stays stored before the cap existed, or under a higher one, may be longer; only those
+        # not yet checked out can still overlap anything the bounded queries look at
+        longest = await conn.scalar(
+            select(func.max(Booking.check_out - Booking.check_in)).where(
+                Booking.check_out >= datetime.now() - self.cap
+            )
+        )
+        self.longest = max(self.cap, longest or self.cap)
+        if self.longest > self.cap:
+            logging.info(f"Longest open stay is {self.longest.days} nights, above the {self.cap.days}-night cap")
+
+    def earliest_check_in(self, moment: datetime) -> datetime:
+        return moment - self.longest
+
+
+# Any booking still in progress at a moment checked in after moment - longest stay.
+# Hot queries add that bound on check_in, which lets the planner skip every older partition
+stay_bound = StayBound(MAX_STAY)
+
+
+def earliest_check_in(moment: datetime) -> datetime:
+    return stay_bound.earliest_check_in(moment)
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def lock_partitions(conn: AsyncConnection, wait: bool = True) -> bool:
+    if wait:
+        await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_ID)))
+        return True
+    return await conn.scalar(select(func.pg_try_advisory_xact_lock(PARTITION_LOCK_ID)))
+
+
+async def list_partitions(conn: AsyncConnection) -> list[Partition]:
+    rows = await conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'bookings'::regclass"
+    ))
+    partitions = []
+    for name, bound in rows:
+        match = _BOUNDS.search(bound)
+        if match:
+            start, end = (datetime.fromisoformat(value).date() for value in match.groups())
+            partitions.append(Partition(name, start, end))
+        else:
+            partitions.append(Partition(name, None, None))
+    return sorted(partitions, key=lambda partition: partition.start or date.max)
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int, since: date | None = None) -> list[str]:
+    partitions = await list_partitions(conn)
+    if not any(partition.name == DEFAULT_PARTITION for partition in partitions):
+        await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF bookings DEFAULT"))
+
+    first = month_start(since or date.today())
+    # Stays booked before their month existed wait in the default partition; give them one now
+    stray = await conn.scalar(text(f"SELECT min(check_in) FROM {DEFAULT_PARTITION}"))
+    if stray is not None:
+        first = min(first, month_start(stray.date()))
+    last = add_months(month_start(date.today()), months_ahead)
+
+    missing = []
+    month = first
+    while month <= last:
+        end = add_months(month, 1)
+        if not any(p.start is not None and p.start <= month and end <= p.end for p in partitions):
+            missing.append(Partition(f"bookings_{month:%Y_%m}", month, end))
+        month = end
+    await _create_partitions(conn, missing)
+    return [partition.name for partition in missing]
+
+
+async def archive_partitions(conn: AsyncConnection, retention: timedelta, tablespace: str = "") -> list[str]:
+    # Runs outside a transaction: every step below commits on its own so the one that
+    # locks bookings stays short
+    cutoff = month_start(date.today() - retention)
+    async with conn.begin():
+        monthly = [partition for partition in await list_partitions(conn) if partition.monthly]
+    archived = []
+    for year in sorted({partition.start.year for partition in monthly}):
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        if end > cutoff:
+            break
+        # A stay nobody completed or cancelled keeps its whole year hot
+        async with conn.begin():
+            open_stays = await conn.scalar(
+                select(Booking.id).where(
+                    Booking.check_in >= start,
+                    Booking.check_in < end,
+                    Booking.status.in_([BookingStatusEnum.ACTIVE, BookingStatusEnum.PENDING])
+                ).limit(1)
+            )
+        if open_stays is not None:
+            logging.info(f"Bookings of {year} still have open stays, not archiving them yet")
+            continue
+
+        months = [partition for partition in monthly if start <= partition.start < end]
+        cold = Partition(f"bookings_{year}", start, end)
+        copied_at = await _copy_cold(conn, cold, tablespace)
+        try:
+            await _swap_cold(conn, cold, months, copied_at)
+        except DBAPIError as e:
+            logging.error(f"Could not attach {cold.name}, months stay as they are: {e}")
+            continue
+        await _drop_months(conn, cold, months)
+        archived.append(cold.name)
+    return archived
+
+
+async def maintain_partitions(
+    conn: AsyncConnection, months_ahead: int, retention: timedelta, tablespace: str = ""
+) -> tuple[list[str], list[str]]:
+    # Session-level lock, so it holds across the separate transactions below.
+    # Another instance is already at it; the next run will catch up
+    locked = await conn.scalar(select(func.pg_try_advisory_lock(PARTITION_LOCK_ID)))
+    await conn.commit()
+    if not locked:
+        return [], []
+    try:
+        async with conn.begin():
+            # Moving stays out of the default partition detaches it, which locks bookings
+            # exclusively; give up rather than queue bookings behind it
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            created = await ensure_partitions(conn, months_ahead)
+        archived = await archive_partitions(conn, retention, tablespace)
+        async with conn.begin():
+            await stay_bound.load(conn)
+    finally:
+        await conn.execute(select(func.pg_advisory_unlock(PARTITION_LOCK_ID)))
+        await conn.commit()
+    return created, archived
+
+
+async def _create_partitions(conn: AsyncConnection, partitions: list[Partition]):
+    if not partitions:
+        return
+    in_new_ranges = " OR ".join(
+        f"(check_in >= '{partition.start}' AND check_in < '{partition.end}')" for partition in partitions
+    )
+    # Postgres refuses a new partition while the default one holds rows for its range, so those
+    # rows are moved across with the default detached
+    stranded = await conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_new_ranges})"))
+    if stranded:
+        await conn.execute(text(f"ALTER TABLE bookings DETACH PARTITION {DEFAULT_PARTITION}"))
+
+    for partition in partitions:
+        await conn.execute(text(
+            f"CREATE TABLE {partition.name} PARTITION OF bookings "
+            f"FOR VALUES FROM ('{partition.start}') TO ('{partition.end}')"
+        ))
+
+    if stranded:
+        await conn.execute(text(
+            f"INSERT INTO bookings ({COLUMNS}) SELECT {COLUMNS} FROM {DEFAULT_PARTITION} WHERE {in_new_ranges}"
+        ))
+        await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_new_ranges}"))
+        await conn.execute(text(f"ALTER TABLE bookings ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+async def _copy_cold(conn: AsyncConnection, cold: Partition, tablespace: str) -> datetime:
+    # The year is copied while its months are still attached, so this only reads bookings.
+    # The copy gets the parent's indexes, foreign keys and a CHECK matching its range up front,
+    # which leaves nothing for ATTACH to build or validate
+    async with conn.begin():
+        copied_at = await conn.scalar(select(func.now()))
+        if tablespace:
+            await conn.execute(text(
+                f"SET LOCAL default_tablespace = {conn.dialect.identifier_preparer.quote(tablespace)}"
+            ))
+        # Left over by a run whose swap gave up; the months were never detached
+        await conn.execute(text(f"DROP TABLE IF EXISTS {cold.name}"))
+        await conn.execute(text(f"CREATE TABLE {cold.name} (LIKE bookings INCLUDING ALL)"))
+        await conn.execute(text(
+            f"ALTER TABLE {cold.name} ADD CONSTRAINT {cold.name}_check_in "
+            f"CHECK (check_in >= '{cold.start}' AND check_in < '{cold.end}')"
+        ))
+        for key in Booking.__table__.foreign_keys:
+            await conn.execute(text(
+                f"ALTER TABLE {cold.name} ADD FOREIGN KEY ({key.parent.name}) "
+                f"REFERENCES {key.column.table.name} ({key.column.name})"
+            ))
+        await conn.execute(text(
+            f"INSERT INTO {cold.name} ({COLUMNS}) SELECT {COLUMNS} FROM bookings "
+            f"WHERE check_in >= '{cold.start}' AND check_in < '{cold.end}'"
+        ))
+    return copied_at
+
+
+async def _swap_cold(conn: AsyncConnection, cold: Partition, months: list[Partition], copied_at: datetime):
+    # The only step that locks bookings exclusively: catalog changes plus the few rows
+    # changed since the copy
+    updates = ", ".join(
+        f"{column.name} = EXCLUDED.{column.name}" for column in Booking.__table__.columns if not column.primary_key
+    )
+    async with conn.begin():
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        for partition in months:
+            await conn.execute(text(f"ALTER TABLE bookings DETACH PARTITION {partition.name}"))
+        for partition in months:
+            # updated_at is the start of the changing transaction, which may predate the copy
+            await conn.execute(
+                text(
+                    f"INSERT INTO {cold.name} ({COLUMNS}) SELECT {COLUMNS} FROM {partition.name} "
+                    f"WHERE updated_at >= :since ON CONFLICT (id, check_in) DO UPDATE SET {updates}"
+                ),
+                {"since": copied_at - CATCH_UP_MARGIN}
+            )
+        await conn.execute(text(
+            f"ALTER TABLE bookings ATTACH PARTITION {cold.name} "
+            f"FOR VALUES FROM ('{cold.start}') TO ('{cold.end}')"
+        ))
+
+
+async def _drop_months(conn: AsyncConnection, cold: Partition, months: list[Partition]):
+    async with conn.begin():
+        for partition in months:
+            # Stays deleted between the copy and the swap
+            await conn.execute(text(
+                f"DELETE FROM {cold.name} AS c "
+                f"WHERE c.check_in >= '{partition.start}' AND c.check_in < '{partition.end}' "
+                f"AND NOT EXISTS (SELECT 1 FROM {partition.name} AS m WHERE m.id = c.id AND m.check_in = c.check_in)"
+            ))
+            await conn.execute(text(f"DROP TABLE {partition.name}"))
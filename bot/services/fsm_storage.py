@@ -0,0 +1,166 @@
+import json
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.postgres_models import FSMState
+from services.postgres_database import PostgresDatabase
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    dirty: bool = False
+
+
+# JSON keeps the table free of executable payloads; the few non-JSON types FSM data holds are tagged
+_DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "decimal": Decimal,
+}
+
+
+def _encode_value(value: Any) -> dict:
+    if isinstance(value, datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"__type__": "date", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__type__": "decimal", "value": str(value)}
+    raise TypeError(f"FSM data cannot store {type(value).__name__}")
+
+
+def _decode_value(obj: dict) -> Any:
+    decoder = _DECODERS.get(obj.get("__type__"))
+    return decoder(obj["value"]) if decoder and len(obj) == 2 else obj
+
+
+def dump_data(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, default=_encode_value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def load_data(raw: bytes) -> Dict[str, Any]:
+    return json.loads(raw, object_hook=_decode_value)
+
+
+_update_buffer: ContextVar[Optional[Dict[str, _Record]]] = ContextVar("fsm_update_buffer", default=None)
+
+
+class PostgresStorage(BaseStorage):
+    def __init__(self, postgres_db: PostgresDatabase, ttl: int):
+        self.postgres_db = postgres_db
+        self.ttl = timedelta(seconds=ttl)
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    @asynccontextmanager
+    async def buffered(self):
+        buffer: Dict[str, _Record] = {}
+        token = _update_buffer.set(buffer)
+        try:
+            yield
+        finally:
+            _update_buffer.reset(token)
+            await self._flush(buffer)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._mark_dirty(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = data.copy()
+        await self._mark_dirty(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._get_record(key)).data.copy()
+
+    async def purge_expired(self) -> int:
+        async with self.postgres_db.session_scope() as session:
+            result = await session.execute(
+                delete(FSMState).where(FSMState.updated_at < func.now() - self.ttl)
+            )
+            return result.rowcount
+
+    async def close(self) -> None:
+        pass
+
+    async def _get_record(self, key: StorageKey) -> _Record:
+        storage_key = self.key_builder.build(key)
+        buffer = _update_buffer.get()
+        if buffer is not None and storage_key in buffer:
+            return buffer[storage_key]
+
+        async with self.postgres_db.async_session_maker() as session:
+            row = (await session.execute(
+                select(FSMState.state, FSMState.data).where(
+                    FSMState.key == storage_key,
+                    FSMState.updated_at >= func.now() - self.ttl
+                )
+            )).first()
+
+        record = _Record()
+        if row:
+            record.state = row.state
+            try:
+                record.data = load_data(row.data) if row.data else {}
+            except ValueError:
+                # Rows written in the old pickle format are never unpickled; the dialog just starts over
+                logging.error(f"Discarding unreadable FSM data for {storage_key}")
+                record.state = None
+        if buffer is not None:
+            buffer[storage_key] = record
+        return record
+
+    async def _mark_dirty(self, key: StorageKey, record: _Record):
+        record.dirty = True
+        if _update_buffer.get() is None:
+            await self._flush({self.key_builder.build(key): record})
+
+    async def _flush(self, records: Dict[str, _Record]):
+        upserts = []
+        deletes = []
+        for storage_key, record in records.items():
+            if not record.dirty:
+                continue
+            if record.state is None and not record.data:
+                deletes.append(storage_key)
+            else:
+                upserts.append({
+                    "key": storage_key,
+                    "state": record.state,
+                    "data": dump_data(record.data) if record.data else None,
+                    "updated_at": func.now(),
+                })
+            record.dirty = False
+
+        if not upserts and not deletes:
+            return
+
+        async with self.postgres_db.session_scope() as session:
+            if upserts:
+                stmt = insert(FSMState).values(upserts)
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=[FSMState.key],
+                    set_={
+                        "state": stmt.excluded.state,
+                        "data": stmt.excluded.data,
+                        "updated_at": stmt.excluded.updated_at,
+                    }
+                ))
+            if deletes:
+                await session.execute(delete(FSMState).where(FSMState.key.in_(deletes)))
@@ -0,0 +1,161 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# [postgres queries, mongo commands] issued while handling the current update
+_update_queries: ContextVar[Optional[list]] = ContextVar("update_queries", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.total += value
+            self.count += 1
+            self.max = max(self.max, value)
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self.handler_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.handler_errors: Dict[Tuple[str, str], int] = {}
+        self.query_latency: Dict[str, Histogram] = {}
+        self.queries_per_update: Dict[str, Histogram] = {}
+        self.gauges: Dict[str, Callable[[], dict]] = {}
+
+    def register_gauges(self, name: str, collect: Callable[[], dict]):
+        self.gauges[name] = collect
+
+    def start_update(self):
+        return _update_queries.set([0, 0])
+
+    def finish_update(self, token, router: str, handler: str, duration: float, failed: bool):
+        postgres_queries, mongo_commands = _update_queries.get()
+        _update_queries.reset(token)
+
+        key = (router, handler)
+        self._histogram(self.handler_latency, key, LATENCY_BUCKETS).observe(duration)
+        self._histogram(self.queries_per_update, "postgres", COUNT_BUCKETS).observe(postgres_queries)
+        self._histogram(self.queries_per_update, "mongo", COUNT_BUCKETS).observe(mongo_commands)
+        if failed:
+            self.handler_errors[key] = self.handler_errors.get(key, 0) + 1
+
+    def observe_query(self, db: str, duration: float):
+        self._histogram(self.query_latency, db, LATENCY_BUCKETS).observe(duration)
+        counters = _update_queries.get()
+        if counters is not None:
+            counters[0 if db == "postgres" else 1] += 1
+
+    def render(self) -> str:
+        lines = ["# TYPE hotel_bot_handler_duration_seconds histogram"]
+        for (router, handler), histogram in sorted(self.handler_latency.items()):
+            lines += histogram.render(
+                "hotel_bot_handler_duration_seconds", f'router="{router}",handler="{handler}"'
+            )
+        lines.append("# TYPE hotel_bot_handler_errors_total counter")
+        for (router, handler), errors in sorted(self.handler_errors.items()):
+            lines.append(f'hotel_bot_handler_errors_total{{router="{router}",handler="{handler}"}} {errors}')
+        lines.append("# TYPE hotel_bot_db_query_duration_seconds histogram")
+        for db, histogram in sorted(self.query_latency.items()):
+            lines += histogram.render("hotel_bot_db_query_duration_seconds", f'db="{db}"')
+        lines.append("# TYPE hotel_bot_db_queries_per_update histogram")
+        for db, histogram in sorted(self.queries_per_update.items()):
+            lines += histogram.render("hotel_bot_db_queries_per_update", f'db="{db}"')
+        lines.append("# TYPE hotel_bot_pool gauge")
+        for pool, collect in sorted(self.gauges.items()):
+            for stat, value in collect().items():
+                lines.append(f'hotel_bot_pool{{pool="{pool}",stat="{stat}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        slowest = sorted(
+            self.handler_latency.items(), key=lambda item: item[1].total, reverse=True
+        )[:10]
+        for (router, handler), histogram in slowest:
+            logging.info(
+                f"{router}.{handler}: {histogram.count} calls, "
+                f"avg {histogram.total / histogram.count * 1000:.1f} ms, "
+                f"max {histogram.max * 1000:.1f} ms"
+            )
+        for db, histogram in sorted(self.queries_per_update.items()):
+            if histogram.count:
+                logging.info(f"{db}: {histogram.total / histogram.count:.2f} queries per update")
+
+    @staticmethod
+    def _histogram(histograms: dict, key, buckets: tuple) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+
+metrics = Metrics()
+
+
+def instrument_engine(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.observe_query("postgres", time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            metrics.observe_query("postgres", time.perf_counter() - started.pop())
+
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.observe_query("mongo", event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        metrics.observe_query("mongo", event.duration_micros / 1_000_000)
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"Metrics endpoint listening on {host}:{port}/metrics")
+    return runner
@@ -0,0 +1,144 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import AddConstraint
+from config.config import config
+from models.postgres_models import Booking
+from services.booking_partitions import COLUMNS, ensure_partitions, lock_partitions
+from services.postgres_database import Base
+
+# Serializes migrations when several instances start at once during a rolling restart
+MIGRATION_LOCK_ID = 7_311_002
+
+
+async def initial_schema(conn: AsyncConnection):
+    await conn.run_sync(Base.metadata.create_all)
+    # Databases created before the exclusion constraint existed only get it here
+    for table in Base.metadata.sorted_tables:
+        for constraint in table.constraints:
+            if not isinstance(constraint, ExcludeConstraint):
+                continue
+            exists = await conn.scalar(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+                {"name": constraint.name}
+            )
+            if not exists:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                await conn.execute(AddConstraint(constraint))
+
+
+async def booking_timestamps_and_daily_stats(conn: AsyncConnection):
+    for name in ("created_at", "updated_at", "cancelled_at"):
+        await conn.execute(text(f"ALTER TABLE bookings ADD COLUMN IF NOT EXISTS {name} timestamptz"))
+    # Older rows never recorded when they were made; check-in is the closest guess available
+    await conn.execute(text(
+        "UPDATE bookings SET created_at = LEAST(check_in::timestamptz, now()) WHERE created_at IS NULL"
+    ))
+    await conn.execute(text("UPDATE bookings SET updated_at = created_at WHERE updated_at IS NULL"))
+    await conn.execute(text(
+        "UPDATE bookings SET cancelled_at = created_at "
+        "WHERE status = 'cancelled' AND cancelled_at IS NULL"
+    ))
+    for name in ("created_at", "updated_at"):
+        await conn.execute(text(
+            f"ALTER TABLE bookings ALTER COLUMN {name} SET DEFAULT now(), ALTER COLUMN {name} SET NOT NULL"
+        ))
+    for name in ("created_at", "updated_at", "cancelled_at"):
+        await conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_bookings_{name} ON bookings ({name})"))
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def booking_query_indexes(conn: AsyncConnection):
+    def create_indexes(sync_conn):
+        for index in Booking.__table__.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+    await conn.run_sync(create_indexes)
+
+
+async def partition_bookings(conn: AsyncConnection):
+    await lock_partitions(conn)
+    kind = await conn.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('bookings')"))
+    if kind == "p":
+        await ensure_partitions(conn, config.BOOKING_PARTITIONS_AHEAD)
+        return
+
+    # The id sequence outlives the old table so booking numbers keep counting up
+    await conn.execute(text("ALTER SEQUENCE IF EXISTS bookings_id_seq OWNED BY NONE"))
+    await conn.execute(text("ALTER TABLE bookings RENAME TO bookings_legacy"))
+    constraints = await conn.scalars(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = 'bookings_legacy'::regclass"
+    ))
+    for name in constraints.all():
+        await conn.execute(text(f'ALTER TABLE bookings_legacy DROP CONSTRAINT "{name}"'))
+    indexes = await conn.scalars(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'bookings_legacy'"
+    ))
+    for name in indexes.all():
+        await conn.execute(text(f'DROP INDEX "{name}"'))
+
+    await conn.run_sync(lambda sync_conn: Booking.__table__.create(sync_conn, checkfirst=True))
+    oldest = await conn.scalar(text("SELECT min(check_in) FROM bookings_legacy"))
+    await ensure_partitions(conn, config.BOOKING_PARTITIONS_AHEAD, since=oldest.date() if oldest else None)
+    await conn.execute(text(f"INSERT INTO bookings ({COLUMNS}) SELECT {COLUMNS} FROM bookings_legacy"))
+    await conn.execute(text("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id"))
+    await conn.execute(text("DROP TABLE bookings_legacy"))
+
+
+async def half_open_stay_range(conn: AsyncConnection):
+    # The index expression changed from '[]' to '[)' bounds, so the old index can no longer serve queries
+    await conn.execute(text("DROP INDEX IF EXISTS ix_bookings_stay_range"))
+    await booking_query_indexes(conn)
+
+
+# Append only: each step must be idempotent, since databases that predate
+# schema_version run every step once against whatever already exists
+MIGRATIONS = [
+    (1, "initial schema", initial_schema),
+    (2, "booking timestamps and daily stats", booking_timestamps_and_daily_stats),
+    (3, "booking query indexes", booking_query_indexes),
+    (4, "partition bookings by check-in month", partition_bookings),
+    (5, "half-open stay range index", half_open_stay_range),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    table = await conn.scalar(
+        text("SELECT to_regclass(quote_ident(current_schema()) || '.schema_version')")
+    )
+    if table is None:
+        return 0
+    return await conn.scalar(text("SELECT coalesce(max(version), 0) FROM schema_version"))
+
+
+async def migrate(conn: AsyncConnection) -> int:
+    version = await current_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version integer PRIMARY KEY, "
+        "name varchar(100) NOT NULL, "
+        "applied_at timestamptz NOT NULL DEFAULT now())"
+    ))
+    version = await current_version(conn)
+    for step, name, apply in MIGRATIONS:
+        if step <= version:
+            continue
+        logging.info(f"Applying schema migration {step}: {name}")
+        await apply(conn)
+        await conn.execute(
+            text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+            {"version": step, "name": name}
+        )
+        version = step
+    return version
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+    async with engine.begin() as conn:
+        return await migrate(conn)
@@ -1,23 +1,112 @@
-from pymongo import ReturnDocument, DESCENDING
+import logging
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
 from models.mongo_models import Review
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
+
+STATS_ID = "approved"
 
 class ReviewCRUD:
     def __init__(self, collection):
         self.collection = collection
+        self.stats = collection.database.review_stats
 
     async def create_review(self, review: Review):
-        return await self.collection.insert_one(review.dict())
+        document = review.model_dump()
+        result = await self.collection.insert_one(document)
+        await self._update_stats(added=[document])
+        return result
+
+    async def create_reviews(self, documents: List[dict]) -> set[int]:
+        failed = set()
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details["writeErrors"]}
+            logging.error(f"Failed to insert {len(failed)} of {len(documents)} reviews: {e.details['writeErrors'][:3]}")
+        inserted = [document for index, document in enumerate(documents) if index not in failed]
+        # The reviews are saved either way; stats drifting here are fixed by tools.rebuild_review_stats
+        try:
+            await self._update_stats(added=inserted)
+        except Exception as e:
+            logging.error(f"Review stats not updated for {len(inserted)} saved reviews: {e}")
+        return failed
 
     async def update_review(self, review_id: str, update_data: dict):
-        return await self.collection.find_one_and_update(
+        before = await self.collection.find_one_and_update(
             {"_id": review_id},
             {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        after = {**before, **update_data}
+        await self._update_stats(removed=[before], added=[after])
+        return after
+
+    async def approve_review(self, review_id: ObjectId):
+        review = await self.collection.find_one_and_update(
+            {"_id": review_id, "is_approved": False},
+            {"$set": {"is_approved": True}},
             return_document=ReturnDocument.AFTER
         )
+        if review:
+            await self._update_stats(added=[review])
+        return review
 
     async def delete_review(self, review_id: str):
-        return await self.collection.delete_one({"_id": review_id})
+        review = await self.collection.find_one_and_delete({"_id": review_id})
+        if review:
+            await self._update_stats(removed=[review])
+        return review
+
+    async def _update_stats(self, removed: Iterable[dict] = (), added: Iterable[dict] = ()):
+        inc = {}
+        for reviews, sign in ((removed, -1), (added, 1)):
+            for review in reviews:
+                if not review.get("is_approved"):
+                    continue
+                rating = review["rating"]
+                for field, value in (("count", 1), ("sum", rating), (f"histogram.{rating}", 1)):
+                    inc[field] = inc.get(field, 0) + sign * value
+        inc = {field: value for field, value in inc.items() if value}
+        if inc:
+            await self.stats.update_one({"_id": STATS_ID}, {"$inc": inc}, upsert=True)
+
+    async def get_rating_summary(self) -> dict:
+        stats = await self.stats.find_one({"_id": STATS_ID}) or {}
+        count = stats.get("count", 0)
+        return {
+            "count": count,
+            "average": stats.get("sum", 0) / count if count else 0,
+            "histogram": {int(rating): n for rating, n in stats.get("histogram", {}).items() if n},
+        }
+
+    async def rebuild_stats(self) -> dict:
+        pipeline = [
+            {"$match": {"is_approved": True}},
+            {"$group": {"_id": "$rating", "count": {"$sum": 1}}}
+        ]
+        histogram = {
+            str(row["_id"]): row["count"]
+            for row in await self.collection.aggregate(pipeline).to_list(None)
+        }
+        await self.stats.replace_one(
+            {"_id": STATS_ID},
+            {
+                "count": sum(histogram.values()),
+                "sum": sum(int(rating) * count for rating, count in histogram.items()),
+                "histogram": histogram,
+            },
+            upsert=True
+        )
+        return await self.get_rating_summary()
+
+    async def ensure_stats(self):
+        if await self.stats.find_one({"_id": STATS_ID}, {"_id": 1}) is None:
+            await self.rebuild_stats()
 
     async def get_reviews(
         self,
@@ -39,10 +128,41 @@ class ReviewCRUD:
             .limit(per_page)\
             .to_list(None)
 
+    async def get_reviews_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        before: Optional[Tuple[datetime, ObjectId]] = None
+    ) -> Tuple[List[dict], bool]:
+        query = {}
+        order = DESCENDING
+        if after:
+            created_at, review_id = after
+            query = {"$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": review_id}}
+            ]}
+        elif before:
+            created_at, review_id = before
+            query = {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": review_id}}
+            ]}
+            order = ASCENDING
+
+        reviews = await self.collection.find(query)\
+            .sort([("created_at", order), ("_id", order)])\
+            .limit(limit + 1)\
+            .to_list(None)
+
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        if order == ASCENDING:
+            reviews.reverse()
+        return reviews, has_more
+
+    async def count_reviews(self) -> int:
+        return await self.collection.estimated_document_count()
+
     async def get_average_rating(self):
-        pipeline = [
-            {"$match": {"is_approved": True}},
-            {"$group": {"_id": None, "average": {"$avg": "$rating"}}}
-        ]
-        result = await self.collection.aggregate(pipeline).to_list(None)
-        return result[0]['average'] if result else 0
\ No newline at end of file
+        return (await self.get_rating_summary())["average"]
\ No newline at end of file
@@ -1,15 +1,138 @@
+import asyncio
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT, monitoring
 from config.config import config
+from services.metrics import MongoCommandMonitor
+from services.mongo_crud.review_crud import ReviewCRUD
+from models.mongo_models import Review
+
+
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.connections = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.connections -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self.timeouts += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.checkouts += 1
+        self.wait_time += event.duration
+        self.max_wait_time = max(self.max_wait_time, event.duration)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def stats(self) -> dict:
+        return {
+            "size": self.connections,
+            "checked_out": self.checked_out,
+            "idle": self.connections - self.checked_out,
+            "checkouts": self.checkouts,
+            "avg_wait_ms": self.wait_time / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_time * 1000,
+            "timeouts": self.timeouts,
+        }
+
+
+class ReviewWriteBuffer:
+    def __init__(self, get_collection, max_size: int, flush_interval: float):
+        self.get_collection = get_collection
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def add(self, document: dict) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        confirmation = loop.create_future()
+        self._pending.append((document, confirmation))
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+        return confirmation
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: list[tuple[dict, asyncio.Future]]):
+        documents = [document for document, _ in batch]
+        try:
+            failed = await ReviewCRUD(self.get_collection()).create_reviews(documents)
+        except Exception as e:
+            # create_reviews swallows stats errors, so anything raised here means the insert itself failed
+            logging.error(f"Review batch of {len(documents)} was not saved: {e}")
+            failed = set(range(len(documents)))
+        for index, (_, confirmation) in enumerate(batch):
+            if not confirmation.done():
+                confirmation.set_result(index not in failed)
+
+    async def drain(self):
+        self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
 
 class MongoDatabase:
     def __init__(self):
         self.client = None
         self.db = None
+        self.pool_monitor = MongoPoolMonitor()
+        self.review_buffer = ReviewWriteBuffer(
+            self.get_reviews_collection,
+            max_size=config.REVIEW_BUFFER_SIZE,
+            flush_interval=config.REVIEW_FLUSH_INTERVAL
+        )
 
     async def connect(self):
         try:
-            self.client = AsyncIOMotorClient(config.mongo_url)
+            self.client = AsyncIOMotorClient(
+                config.mongo_url,
+                maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=config.MONGO_MIN_POOL_SIZE,
+                event_listeners=[self.pool_monitor, MongoCommandMonitor()]
+            )
             self.db = self.client[config.MONGO_DB]
             await self.client.admin.command('ping')
             print("✅ MongoDB connected")
@@ -24,6 +147,7 @@ class MongoDatabase:
                 IndexModel([("user_id", ASCENDING)]),
                 IndexModel([("rating", DESCENDING)]),
                 IndexModel([("created_at", DESCENDING)]),
+                IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
                 IndexModel([("is_approved", ASCENDING)])
             ])
             print("✅ MongoDB indexes created")
@@ -31,8 +155,19 @@ class MongoDatabase:
             print(f"❌ MongoDB index creation error: {e}")
             raise
         
+    def pool_stats(self) -> dict:
+        return self.pool_monitor.stats()
+
     def get_reviews_collection(self):
         return self.db.reviews
 
     async def save_review(self, review_data: dict):
-        return await self.get_reviews_collection().insert_one(review_data)
\ No newline at end of file
+        return await self.get_reviews_collection().insert_one(review_data)
+
+    def buffer_review(self, review: Review) -> asyncio.Future:
+        return self.review_buffer.add(review.model_dump())
+
+    async def close(self):
+        await self.review_buffer.drain()
+        if self.client is not None:
+            self.client.close()
@@ -1,13 +1,26 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
-from models.postgres_models import Booking, BookingStatusEnum
+from sqlalchemy import cast, func, select, delete, insert, tuple_, update
+from models.postgres_models import Booking, BookingStatusEnum, Room
+from services.availability_index import availability_index
+from services.booking_partitions import MAX_STAY, earliest_check_in
+from services.postgres_database import on_commit
+from services.search_cache import search_cache
 from datetime import datetime
 
+# Advisory lock namespace for per-room reservations; the room id is the second key
+ROOM_LOCK_SPACE = 7_311_004
+
+def check_stay_length(check_in, check_out):
+    # Partition pruning bounds assume no stored stay is longer than the cap
+    if check_out - check_in > MAX_STAY:
+        raise ValueError(f"Stay of {(check_out - check_in).days} nights exceeds the {MAX_STAY.days}-night cap")
+
 class BookingCRUD:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create_booking(self, total_price, user_id, room_id, check_in, check_out, status=BookingStatusEnum.ACTIVE, paid=False):
+        check_stay_length(check_in, check_out)
         booking = Booking(
             total_price=total_price,
             user_id=user_id,
@@ -19,8 +32,47 @@ class BookingCRUD:
         )
         self.session.add(booking)
         await self.session.flush()
+        if status != BookingStatusEnum.CANCELLED:
+            self._track_new_booking(booking.id, room_id, check_in, check_out)
         return booking
 
+    async def reserve(self, total_price, user_id, room_id, check_in, check_out):
+        check_stay_length(check_in, check_out)
+        # Bookings of one room may sit in different partitions, which no exclusion constraint can
+        # cover, so reservations of a room queue on a lock and insert only if nothing overlaps
+        await self.session.execute(select(func.pg_advisory_xact_lock(ROOM_LOCK_SPACE, room_id)))
+        overlapping = select(Booking.id).where(
+            Booking.room_id == room_id,
+            Booking.status != BookingStatusEnum.CANCELLED,
+            Booking.check_in >= earliest_check_in(check_in),
+            Booking.check_in < check_out,
+            Booking.check_out > check_in
+        )
+        values = {
+            "total_price": total_price,
+            "user_id": user_id,
+            "room_id": room_id,
+            "check_in": check_in,
+            "check_out": check_out,
+            "status": BookingStatusEnum.ACTIVE,
+            "paid": False,
+        }
+        row = select(*(cast(value, Booking.__table__.c[name].type) for name, value in values.items()))
+        stmt = insert(Booking).from_select(list(values), row.where(~overlapping.exists())).returning(Booking.id)
+        booking_id = (await self.session.execute(stmt)).scalar()
+        if booking_id is None:
+            await self.session.rollback()
+            return None
+        self._track_new_booking(booking_id, room_id, check_in, check_out)
+        return booking_id
+
+    def _track_new_booking(self, booking_id, room_id, check_in, check_out):
+        on_commit(
+            self.session,
+            lambda: availability_index.add_booking(booking_id, room_id, check_in, check_out)
+        )
+        on_commit(self.session, lambda: search_cache.invalidate_range(check_in, check_out))
+
     async def get_user_bookings(self, user_id: int):
         result = await self.session.execute(
             select(Booking).where(Booking.user_id == user_id)
@@ -34,7 +86,7 @@ class BookingCRUD:
     async def get_active_bookings(self):
         now = datetime.now()
         result = await self.session.execute(
-            select(Booking).where(Booking.check_out > now)
+            select(Booking).where(Booking.check_out > now, Booking.check_in >= earliest_check_in(now))
         )
         return result.scalars().all()
     
@@ -47,21 +99,55 @@ class BookingCRUD:
         return result.scalars().all()
 
     async def cancel_booking(self, booking_id: int):
-        stmt = update(Booking).where(Booking.id == booking_id).values(status=BookingStatusEnum.CANCELLED)
-        await self.session.execute(stmt)
+        stmt = (
+            update(Booking)
+            .where(Booking.id == booking_id)
+            .values(status=BookingStatusEnum.CANCELLED, cancelled_at=func.now())
+            .returning(Booking.room_id, Booking.check_in, Booking.check_out)
+        )
+        cancelled = (await self.session.execute(stmt)).first()
+        on_commit(self.session, lambda: availability_index.remove_booking(booking_id))
+        if cancelled:
+            on_commit(
+                self.session,
+                lambda: search_cache.invalidate_range(cancelled.check_in, cancelled.check_out)
+            )
         await self.session.commit()
+        return cancelled
 
     async def mark_as_paid(self, booking_id: int):
         stmt = update(Booking).where(Booking.id == booking_id).values(paid=True)
-        await self.session.execute(stmt)
+        result = await self.session.execute(stmt)
         await self.session.commit()
+        return result.rowcount > 0
         
+    async def complete_finished_bookings(self, limit: int) -> int:
+        now = datetime.now()
+        # SKIP LOCKED leaves rows someone is cancelling or paying right now to a later batch
+        finished = (
+            select(Booking.id, Booking.check_in)
+            .where(
+                Booking.status == BookingStatusEnum.ACTIVE,
+                Booking.check_out < now,
+                Booking.check_in < now
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(
+            update(Booking)
+            .where(tuple_(Booking.id, Booking.check_in).in_(finished))
+            .values(status=BookingStatusEnum.COMPLETED)
+        )
+        return result.rowcount
+
     async def get_active_bookings_by_user_id(self, user_id: int):
         now = datetime.now()
         stmt = select(Booking).where(
             Booking.user_id == user_id,
             Booking.status == BookingStatusEnum.ACTIVE,
-            Booking.check_out > now
+            Booking.check_out > now,
+            Booking.check_in >= earliest_check_in(now)
         )
         result = await self.session.execute(stmt)
         return result.scalars().all()
@@ -72,7 +158,38 @@ class BookingCRUD:
             Booking.user_id == user_id,
             Booking.status == BookingStatusEnum.ACTIVE,
             Booking.check_out > now,
+            Booking.check_in >= earliest_check_in(now),
             Booking.paid == False
         )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+    async def list_unpaid_bookings(self, user_id: int):
+        return await self._list_bookings(user_id, Booking.paid == False)
+
+    async def list_active_bookings(self, user_id: int):
+        return await self._list_bookings(user_id)
+
+    async def _list_bookings(self, user_id: int, *conditions):
+        now = datetime.now()
+        # Plain rows with just what the listing keyboards render, no ORM identity map or eager loads
+        stmt = (
+            select(
+                Booking.id,
+                Room.human_name.label("room_name"),
+                Booking.check_in,
+                Booking.check_out,
+                Booking.total_price
+            )
+            .join(Room, Room.id == Booking.room_id)
+            .where(
+                Booking.user_id == user_id,
+                Booking.status == BookingStatusEnum.ACTIVE,
+                Booking.check_out > now,
+                Booking.check_in >= earliest_check_in(now),
+                *conditions
+            )
+            .order_by(Booking.check_in)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, DateTime, and_, cast, func, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.postgres_models import Booking, BookingDailyStats, BookingStatusEnum, RollupWatermark, stay_range
+
+ROLLUP_NAME = "booking_daily_stats"
+ONE_DAY = timedelta(days=1)
+
+class BookingStatsCRUD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def refresh_rollup(self, lag: timedelta) -> int:
+        # FOR UPDATE keeps two instances from rolling up the same slice at once
+        watermark = await self.session.scalar(
+            select(RollupWatermark.processed_until)
+            .where(RollupWatermark.name == ROLLUP_NAME)
+            .with_for_update()
+        )
+        # Rows committed late by slow transactions still land inside the lag window
+        processed_until = await self.session.scalar(select(func.now() - lag))
+
+        changed = select(
+            Booking.created_at, Booking.cancelled_at, Booking.check_in, Booking.check_out
+        ).where(Booking.updated_at <= processed_until)
+        if watermark is not None:
+            changed = changed.where(Booking.updated_at > watermark)
+        changed = changed.cte("changed")
+
+        nights = func.generate_series(
+            func.date_trunc("day", changed.c.check_in), changed.c.check_out - ONE_DAY, ONE_DAY
+        )
+        days = union(
+            select(cast(changed.c.created_at, Date).label("day")),
+            select(cast(changed.c.cancelled_at, Date)).where(changed.c.cancelled_at.is_not(None)),
+            select(cast(nights, Date)),
+        ).subquery("days")
+
+        # Touched days are recomputed from bookings, so replaying a slice never double counts
+        day_start = cast(days.c.day, DateTime)
+        day_end = day_start + ONE_DAY
+        created = and_(Booking.created_at >= day_start, Booking.created_at < day_end)
+        not_cancelled = Booking.status != BookingStatusEnum.CANCELLED
+        rows = select(
+            days.c.day,
+            select(func.count(Booking.id)).where(created).scalar_subquery(),
+            select(func.coalesce(func.sum(Booking.total_price), 0)).where(created, not_cancelled).scalar_subquery(),
+            select(func.count(Booking.id)).where(
+                Booking.cancelled_at >= day_start, Booking.cancelled_at < day_end
+            ).scalar_subquery(),
+            select(func.count(Booking.id)).where(
+                stay_range(Booking.check_in, Booking.check_out).op("&&")(stay_range(day_start, day_end)),
+                not_cancelled
+            ).scalar_subquery(),
+        ).where(days.c.day.is_not(None))
+
+        columns = ["day", "bookings", "revenue", "cancellations", "room_nights"]
+        upsert = pg_insert(BookingDailyStats).from_select(columns, rows)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[BookingDailyStats.day],
+            set_={name: upsert.excluded[name] for name in columns[1:]}
+        )
+        result = await self.session.execute(upsert)
+
+        advance = pg_insert(RollupWatermark).values(name=ROLLUP_NAME, processed_until=processed_until)
+        await self.session.execute(advance.on_conflict_do_update(
+            index_elements=[RollupWatermark.name],
+            set_={"processed_until": advance.excluded.processed_until}
+        ))
+        return result.rowcount
+
+    async def get_window(self, start: date, end: date) -> dict:
+        processed_until = (
+            select(RollupWatermark.processed_until)
+            .where(RollupWatermark.name == ROLLUP_NAME)
+            .scalar_subquery()
+        )
+        row = (await self.session.execute(
+            select(
+                func.coalesce(func.sum(BookingDailyStats.bookings), 0),
+                func.coalesce(func.sum(BookingDailyStats.revenue), 0),
+                func.coalesce(func.sum(BookingDailyStats.cancellations), 0),
+                func.coalesce(func.sum(BookingDailyStats.room_nights), 0),
+                processed_until,
+            ).where(BookingDailyStats.day >= start, BookingDailyStats.day < end)
+        )).one()
+        bookings, revenue, cancellations, room_nights, updated = row
+        return {
+            "bookings": bookings,
+            "revenue": revenue,
+            "cancellations": cancellations,
+            "room_nights": room_nights,
+            "processed_until": updated,
+        }
+
+    async def get_last_days(self, days: int, today: date | None = None) -> dict:
+        end = (today or datetime.now().date()) + ONE_DAY
+        return await self.get_window(end - timedelta(days=days), end)
@@ -1,8 +1,18 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, case, func, not_, select
-from models.postgres_models import Booking, BookingStatusEnum, Room, RoomStatusEnum
+from sqlalchemy import not_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.postgres_models import Booking, BookingStatusEnum, Room, RoomStatusEnum, stay_range
+from services.availability_index import availability_index
+from services.booking_partitions import earliest_check_in
+from services.postgres_crud.booking_stats_crud import BookingStatsCRUD
+from services.postgres_database import on_commit
+from services.room_catalog import RoomSnapshot, room_catalog
+from services.search_cache import search_cache
+
+# About ten bind parameters per room row; keeps each statement under asyncpg's 32767 limit
+BULK_INSERT_CHUNK = 1000
 
 class RoomCRUD:
     def __init__(self, session: AsyncSession):
@@ -20,12 +30,40 @@ class RoomCRUD:
             )
             self.session.add(new_room)
             await self.session.flush()
+            on_commit(
+                self.session,
+                lambda: availability_index.set_room_status(new_room.id, RoomStatusEnum.AVAILABLE)
+            )
+            on_commit(self.session, search_cache.clear)
+            on_commit(self.session, room_catalog.invalidate)
             return new_room
 
+    async def bulk_create_rooms(self, rows: list[dict]) -> list[int]:
+        created = []
+        for start in range(0, len(rows), BULK_INSERT_CHUNK):
+            result = await self.session.execute(
+                pg_insert(Room)
+                .values(rows[start:start + BULK_INSERT_CHUNK])
+                .on_conflict_do_nothing(index_elements=[Room.number])
+                .returning(Room.id)
+            )
+            created.extend(result.scalars().all())
+
+        if created:
+            on_commit(
+                self.session,
+                lambda: availability_index.update_room_statuses(
+                    dict.fromkeys(created, RoomStatusEnum.AVAILABLE)
+                )
+            )
+            on_commit(self.session, search_cache.clear)
+            on_commit(self.session, room_catalog.invalidate)
+        return created
+
     async def update_room_status(self, room_id: int, status: RoomStatusEnum):
-        room = await self.get_room_by_id(room_id)
-        if room:
-            room.status = status
+        await self._apply_status_update(
+            update(Room).where(Room.id == room_id).values(status=status)
+        )
 
     async def get_room(self, room_id: int):
         result = await self.session.execute(
@@ -33,14 +71,10 @@ class RoomCRUD:
             )
         return result.scalar_one_or_none()
 
-    async def get_all_rooms_paginated(self, page: int = 1, per_page: int = 10):
+    async def get_all_rooms_paginated(self, page: int = 1, per_page: int = 10) -> list[RoomSnapshot]:
         offset = (page - 1) * per_page
-        result = await self.session.execute(
-            select(Room)
-            .offset(offset)
-            .limit(per_page)
-        )
-        return result.scalars().all()
+        await room_catalog.ensure_loaded(self.session)
+        return room_catalog.all()[offset:offset + per_page]
 
     async def get_rooms_by_type(self, room_type: str):
         result = await self.session.execute(
@@ -48,13 +82,31 @@ class RoomCRUD:
             )
         return result.scalars().all()
     
+    async def get_available_room_ids(self, check_in: datetime, check_out: datetime) -> tuple[int, ...]:
+        room_ids = search_cache.get((check_in, check_out))
+        if room_ids is not None:
+            return room_ids
+
+        if availability_index.loaded:
+            room_ids = tuple(availability_index.get_available_room_ids(check_in, check_out))
+        else:
+            room_ids = tuple(room.id for room in await self._query_available_rooms(check_in, check_out))
+        search_cache.set((check_in, check_out), room_ids)
+        return room_ids
+
     async def get_available_rooms(self, check_in: datetime, check_out: datetime):
+        room_ids = await self.get_available_room_ids(check_in, check_out)
+        return await self.get_rooms_by_ids(room_ids) if room_ids else []
+
+    async def _query_available_rooms(self, check_in: datetime, check_out: datetime):
         try:
             subquery = select(Booking.room_id).where(
-                and_(
-                    Booking.check_in <= check_out,
-                    Booking.check_out >= check_in
-                )
+                stay_range(Booking.check_in, Booking.check_out).op("&&")(
+                    stay_range(check_in, check_out)
+                ),
+                Booking.status != BookingStatusEnum.CANCELLED,
+                Booking.check_in >= earliest_check_in(check_in),
+                Booking.check_in < check_out
             )
             result = await self.session.execute(
                 select(Room).where(
@@ -66,81 +118,89 @@ class RoomCRUD:
             logging.error(f"Error getting available rooms: {str(e)}")
             return []
 
-    async def get_room_by_id(self, room_id: int):
-        result = await self.session.execute(
-            select(Room).where(Room.id == room_id)
-        )
-        return result.scalars().first()
+    async def get_room_by_id(self, room_id: int) -> RoomSnapshot | None:
+        await room_catalog.ensure_loaded(self.session)
+        return room_catalog.get(room_id)
 
-    async def get_all_rooms(self):
-        result = await self.session.execute(select(Room))
-        return result.scalars().all()
+    async def get_all_rooms(self) -> list[RoomSnapshot]:
+        await room_catalog.ensure_loaded(self.session)
+        return room_catalog.all()
     
-    async def get_rooms_statistics(self):
-        income = await self.session.execute(
-            select(func.sum(Booking.total_price))
-            )
-        total_income = income.scalar() or 0
-
-        rooms_status = await self.session.execute(
-            select(
-                func.count(Room.id),
-                func.sum(case((Room.status == RoomStatusEnum.AVAILABLE, 1), else_=0))
-            )
-        )
-        total_rooms, available_rooms = rooms_status.first()
+    async def get_rooms_statistics(self, start: date, end: date):
+        stats = await BookingStatsCRUD(self.session).get_window(start, end)
+        rooms = await self.get_all_rooms()
+        total_rooms = len(rooms)
+        available_rooms = sum(1 for room in rooms if room.status == RoomStatusEnum.AVAILABLE)
+        capacity_nights = total_rooms * (end - start).days
 
-        bookings_count = await self.session.execute(
-            select(func.count(Booking.id))
-        )
-            
         return {
-            "total_income": total_income,
+            "total_income": stats["revenue"],
             "total_rooms": total_rooms,
             "available_rooms": available_rooms,
-            "total_bookings": bookings_count.scalar()
+            "total_bookings": stats["bookings"],
+            "cancellations": stats["cancellations"],
+            "room_nights": stats["room_nights"],
+            "occupancy": stats["room_nights"] / capacity_nights if capacity_nights else 0,
+            "updated_at": stats["processed_until"]
         }
 
-    async def refresh_rooms_availability(self):
-        rooms = await self.get_all_rooms()
-        for room in rooms:
-            active_bookings = await self.session.execute(
-                select(Booking).where(
-                    and_(
-                        Booking.room_id == room.id,
-                        Booking.check_out >= datetime.now(),
-                        Booking.status == BookingStatusEnum.ACTIVE
-                    )
-                )
-            )
-            if active_bookings.scalars().first():
-                room.status = RoomStatusEnum.BOOKED
-            else:
-                if room.status != RoomStatusEnum.MAINTENANCE and room.status != RoomStatusEnum.CLOSED:
-                    room.status = RoomStatusEnum.AVAILABLE
+    async def refresh_rooms_availability(self, room_ids: list[int] | None = None):
+        now = datetime.now()
+        has_active_booking = select(Booking.id).where(
+            Booking.room_id == Room.id,
+            Booking.status == BookingStatusEnum.ACTIVE,
+            Booking.check_out >= now,
+            Booking.check_in >= earliest_check_in(now)
+        ).exists()
+
+        booked = update(Room).where(
+            Room.id == Booking.room_id,
+            Booking.status == BookingStatusEnum.ACTIVE,
+            Booking.check_out >= now,
+            Booking.check_in >= earliest_check_in(now),
+            Room.status != RoomStatusEnum.BOOKED
+        ).values(status=RoomStatusEnum.BOOKED)
+
+        released = update(Room).where(
+            Room.status == RoomStatusEnum.BOOKED,
+            not_(has_active_booking)
+        ).values(status=RoomStatusEnum.AVAILABLE)
+
+        if room_ids is not None:
+            booked = booked.where(Room.id.in_(room_ids))
+            released = released.where(Room.id.in_(room_ids))
+
+        statuses = await self._apply_status_update(booked)
+        statuses.update(await self._apply_status_update(released))
         await self.session.commit()
+        return statuses
 
     async def auto_update_statuses(self):
-        rooms = await self.get_all_rooms()
-        for room in rooms:
-            if room.status == RoomStatusEnum.BOOKED:
-                bookings = await self.session.execute(
-                    select(Booking).where(
-                        Booking.room_id == room.id,
-                        Booking.check_out < datetime.now()
-                    )
-                )
-                if not bookings.scalars().all():
-                    room.status = RoomStatusEnum.AVAILABLE
-
-    async def get_rooms_by_ids(self, ids: list[int]) -> list:
-        result = await self.session.execute(
-            select(Room).where(Room.id.in_(ids))
+        has_finished_booking = select(Booking.id).where(
+            Booking.room_id == Room.id,
+            Booking.check_out < datetime.now()
+        ).exists()
+        return await self._apply_status_update(
+            update(Room).where(
+                Room.status == RoomStatusEnum.BOOKED,
+                not_(has_finished_booking)
+            ).values(status=RoomStatusEnum.AVAILABLE)
         )
-        return result.scalars().all()
+
+    async def _apply_status_update(self, stmt) -> dict:
+        result = await self.session.execute(stmt.returning(Room.id, Room.status))
+        statuses = {room_id: status for room_id, status in result}
+        if statuses:
+            on_commit(self.session, lambda: availability_index.update_room_statuses(statuses))
+            on_commit(self.session, search_cache.clear)
+            on_commit(self.session, lambda: room_catalog.update_statuses(statuses))
+        return statuses
+
+    async def get_rooms_by_ids(self, ids: list[int]) -> list[RoomSnapshot]:
+        await room_catalog.ensure_loaded(self.session)
+        return room_catalog.get_many(ids)
 
 async def create_initial_rooms(session: AsyncSession):
-    room_crud = RoomCRUD(session)
     types_config = [
             ("economy", "Эконом", 8, 2000, 2),
             ("standard", "Стандарт", 12, 3500, 3),
@@ -148,13 +208,18 @@ async def create_initial_rooms(session: AsyncSession):
             ("vip", "VIP", 2, 12000, 6)
     ]
     
-    for room_type, human_name, count, price, capacity in types_config:
-        for i in range(1, count + 1):
-            await room_crud.create_room(
-                number=f"{room_type[0].upper()}{i:03}",
-                human_name=human_name,
-                room_type=room_type,
-                price=price,
-                capacity=capacity,
-                description=f"{room_type.capitalize()} номер"
-            )
\ No newline at end of file
+    rows = [
+        {
+            "number": f"{room_type[0].upper()}{i:03}",
+            "human_name": human_name,
+            "type": room_type,
+            "price": price,
+            "capacity": capacity,
+            "description": f"{room_type.capitalize()} номер"
+        }
+        for room_type, human_name, count, price, capacity in types_config
+        for i in range(1, count + 1)
+    ]
+    created = await RoomCRUD(session).bulk_create_rooms(rows)
+    if created:
+        logging.info(f"Seeded {len(created)} rooms")
@@ -1,6 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from models.postgres_models import User, Booking
+from services.postgres_database import on_commit
+from services.user_cache import user_id_cache
 
 class UserCRUD:
     def __init__(self, session: AsyncSession):
@@ -29,9 +32,18 @@ class UserCRUD:
         )
         return result.scalar_one_or_none()
 
+    async def get_user_id_by_telegram_id(self, telegram_id: int) -> int | None:
+        user_id = user_id_cache.get(telegram_id)
+        if user_id is None:
+            user_id = await self.session.scalar(select(User.id).where(User.telegram_id == telegram_id))
+            if user_id is not None:
+                user_id_cache.set(telegram_id, user_id)
+        return user_id
+
     async def update_user(self, user_id: int, **kwargs):
         stmt = update(User).where(User.id == user_id).values(**kwargs)
         await self.session.execute(stmt)
+        on_commit(self.session, lambda: user_id_cache.forget_user(user_id))
 
     async def delete_user(self, user_id: int):
         await self.session.execute(
@@ -40,9 +52,23 @@ class UserCRUD:
         await self.session.execute(
             delete(User).where(User.id == user_id)
         )
-        
-    async def get_or_create_user(self, telegram_id: int, name: str, surname: str):
-        user = await self.get_user_by_telegram_id(telegram_id)
-        if user:
-            return user
-        return await self.create_user(telegram_id=telegram_id, name=name, surname=surname)
\ No newline at end of file
+        on_commit(self.session, lambda: user_id_cache.forget_user(user_id))
+
+    async def upsert_user(self, telegram_id: int, name: str, surname: str, update_profile: bool = False) -> int:
+        stmt = pg_insert(User).values(telegram_id=telegram_id, name=name, surname=surname)
+        # DO NOTHING would return no row for an existing user, so a no-op update keeps RETURNING working
+        if update_profile:
+            changes = {"name": stmt.excluded.name, "surname": stmt.excluded.surname}
+        else:
+            changes = {"telegram_id": stmt.excluded.telegram_id}
+        user_id = await self.session.scalar(
+            stmt.on_conflict_do_update(index_elements=[User.telegram_id], set_=changes).returning(User.id)
+        )
+        on_commit(self.session, lambda: user_id_cache.set(telegram_id, user_id))
+        return user_id
+
+    async def get_or_create_user_id(self, telegram_id: int, name: str, surname: str) -> int:
+        user_id = await self.get_user_id_by_telegram_id(telegram_id)
+        if user_id is not None:
+            return user_id
+        return await self.upsert_user(telegram_id=telegram_id, name=name, surname=surname)
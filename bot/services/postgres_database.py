@@ -1,25 +1,89 @@
+import time
 from contextlib import asynccontextmanager
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config.config import config
+from services.metrics import instrument_engine
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "avg_wait_ms": self.wait_time / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_time * 1000,
+            "timeouts": self.timeouts,
+        }
+
+
 class PostgresDatabase:
     def __init__(self):
-        self.engine = create_async_engine(config.postgres_url)
+        self.engine = create_async_engine(
+            config.postgres_url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=config.POSTGRES_POOL_SIZE,
+            max_overflow=config.POSTGRES_MAX_OVERFLOW,
+            pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+            pool_recycle=config.POSTGRES_POOL_RECYCLE,
+            pool_pre_ping=config.POSTGRES_POOL_PRE_PING,
+            connect_args={"statement_cache_size": config.POSTGRES_STATEMENT_CACHE_SIZE}
+        )
+        instrument_engine(self.engine)
         self.async_session_maker = async_sessionmaker(
             self.engine, 
             expire_on_commit=False,
             autoflush=False
         )
 
-    async def create_tables(self):
-        async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+    def pool_stats(self) -> dict:
+        return self.engine.sync_engine.pool.stats()
 
     @asynccontextmanager
     async def session_scope(self):
         async with self.async_session_maker() as session:
             async with session.begin():  
-                yield session
\ No newline at end of file
+                yield session
+
+
+def on_commit(session: AsyncSession, callback):
+    session.sync_session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(session):
+    session.info.pop("on_commit", None)
@@ -0,0 +1,76 @@
+import logging
+import time
+from decimal import Decimal
+from typing import NamedTuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import config
+from models.postgres_models import Room, RoomStatusEnum
+
+
+class RoomSnapshot(NamedTuple):
+    id: int
+    number: str
+    human_name: str
+    type: str
+    price: Decimal
+    capacity: int
+    description: str
+    status: RoomStatusEnum
+
+
+class RoomCatalog:
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self._rooms: dict[int, RoomSnapshot] = {}
+        self._ordered: list[RoomSnapshot] = []
+        self._expires_at: float | None = None
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._expires_at is not None and self._expires_at > time.monotonic()
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        version = self._version
+        result = await session.execute(
+            select(
+                Room.id, Room.number, Room.human_name, Room.type,
+                Room.price, Room.capacity, Room.description, Room.status
+            ).order_by(Room.id)
+        )
+        rooms = [RoomSnapshot(*row) for row in result]
+        self._ordered = rooms
+        self._rooms = {room.id: room for room in rooms}
+        # A change committed while the query ran may be missing, so reload on the next read
+        if version != self._version:
+            return
+
+        self._expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        logging.info(f"Room catalog loaded: {len(rooms)} rooms")
+
+    def get(self, room_id: int) -> RoomSnapshot | None:
+        return self._rooms.get(room_id)
+
+    def get_many(self, room_ids) -> list[RoomSnapshot]:
+        return [self._rooms[room_id] for room_id in sorted(room_ids) if room_id in self._rooms]
+
+    def all(self) -> list[RoomSnapshot]:
+        return list(self._ordered)
+
+    def update_statuses(self, statuses: dict[int, RoomStatusEnum]):
+        for room_id, status in statuses.items():
+            room = self._rooms.get(room_id)
+            if room is not None and room.status != status:
+                self._rooms[room_id] = room._replace(status=status)
+        self._ordered = [self._rooms[room.id] for room in self._ordered]
+        self._version += 1
+
+    def invalidate(self):
+        self._expires_at = None
+        self._version += 1
+
+
+room_catalog = RoomCatalog(ttl=config.ROOM_CATALOG_TTL)
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from config.config import config
+from services.availability_index import availability_index
+from services.booking_partitions import maintain_partitions
+from services.postgres_crud.booking_crud import BookingCRUD
+from services.postgres_crud.booking_stats_crud import BookingStatsCRUD
+from services.postgres_crud.room_crud import RoomCRUD
+from services.postgres_database import PostgresDatabase
+from services.search_cache import search_cache
+
+
+class BackgroundScheduler:
+    def __init__(self, postgres_db: PostgresDatabase):
+        self.postgres_db = postgres_db
+        self._jobs: list[tuple[str, Callable[[], Awaitable], float]] = []
+        self._tasks: list[asyncio.Task] = []
+        self._pending_rooms: set[int] = set()
+        self._full_refresh_requested = False
+        self._wakeup = asyncio.Event()
+
+        self.add_job("room_statuses", self.refresh_statuses, config.STATUS_REFRESH_INTERVAL)
+        self.add_job("availability_index", self.reload_availability_index, config.AVAILABILITY_RELOAD_INTERVAL)
+        self.add_job("booking_stats", self.refresh_booking_stats, config.STATS_ROLLUP_INTERVAL)
+        self.add_job("booking_partitions", self.maintain_booking_partitions, config.BOOKING_PARTITION_INTERVAL)
+        self.add_job("booking_lifecycle", self.complete_finished_bookings, config.BOOKING_SWEEP_INTERVAL)
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], interval: float):
+        self._jobs.append((name, func, interval))
+
+    def request_room_refresh(self, room_id: int | None = None):
+        if room_id is None:
+            self._full_refresh_requested = True
+        else:
+            self._pending_rooms.add(room_id)
+        self._wakeup.set()
+
+    async def refresh_statuses(self, room_ids: list[int] | None = None):
+        async with self.postgres_db.async_session_maker() as session:
+            await RoomCRUD(session).refresh_rooms_availability(room_ids)
+
+    async def reload_availability_index(self):
+        # Local on_commit hooks only see this process's writes; a reload picks up everyone else's
+        async with self.postgres_db.async_session_maker() as session:
+            await availability_index.load(session)
+        search_cache.clear()
+
+    async def refresh_booking_stats(self):
+        async with self.postgres_db.session_scope() as session:
+            days = await BookingStatsCRUD(session).refresh_rollup(timedelta(seconds=config.STATS_ROLLUP_LAG))
+        if days:
+            logging.info(f"Booking stats rollup updated {days} days")
+
+    async def complete_finished_bookings(self):
+        started = time.perf_counter()
+        completed = 0
+        batches = 0
+        # One short transaction per batch, so row locks never pile up behind a long sweep
+        while True:
+            async with self.postgres_db.session_scope() as session:
+                batch = await BookingCRUD(session).complete_finished_bookings(config.BOOKING_SWEEP_BATCH)
+            completed += batch
+            batches += 1
+            if batch < config.BOOKING_SWEEP_BATCH:
+                break
+        if completed:
+            elapsed = time.perf_counter() - started
+            logging.info(
+                f"Completed {completed} finished bookings in {batches} batches, "
+                f"{elapsed:.1f}s ({completed / elapsed:.0f} bookings/s)"
+            )
+
+    async def maintain_booking_partitions(self):
+        async with self.postgres_db.engine.connect() as conn:
+            created, archived = await maintain_partitions(
+                conn,
+                months_ahead=config.BOOKING_PARTITIONS_AHEAD,
+                retention=timedelta(days=config.BOOKING_ARCHIVE_AFTER_DAYS),
+                tablespace=config.BOOKING_ARCHIVE_TABLESPACE
+            )
+        if created:
+            logging.info(f"Created booking partitions: {', '.join(created)}")
+        if archived:
+            logging.info(f"Archived bookings into cold partitions: {', '.join(archived)}")
+
+    def start(self):
+        for name, func, interval in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run_periodic(name, func, interval)))
+        self._tasks.append(asyncio.create_task(self._run_on_demand()))
+        logging.info(f"Background scheduler started: {', '.join(name for name, _, _ in self._jobs)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run_periodic(self, name: str, func: Callable[[], Awaitable], interval: float):
+        while True:
+            try:
+                await func()
+            except Exception as e:
+                logging.error(f"Background job {name} failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _run_on_demand(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            room_ids = None if self._full_refresh_requested else sorted(self._pending_rooms)
+            self._full_refresh_requested = False
+            self._pending_rooms.clear()
+            try:
+                await self.refresh_statuses(room_ids)
+            except Exception as e:
+                logging.error(f"Room status refresh failed for {room_ids or 'all rooms'}: {e}")
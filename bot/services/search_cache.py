@@ -0,0 +1,14 @@
+from datetime import datetime
+from config.config import config
+from services.cache import TTLCache
+
+
+class SearchCache(TTLCache):
+    def invalidate_range(self, check_in: datetime, check_out: datetime):
+        for key in self.keys():
+            cached_in, cached_out = key
+            if cached_in <= check_out and cached_out >= check_in:
+                self.pop(key)
+
+
+search_cache = SearchCache(maxsize=config.SEARCH_CACHE_SIZE, ttl=config.SEARCH_CACHE_TTL)
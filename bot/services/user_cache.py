@@ -0,0 +1,13 @@
+from config.config import config
+from services.cache import TTLCache
+
+
+class UserIdCache(TTLCache):
+    def forget_user(self, user_id: int):
+        for telegram_id in self.keys():
+            if self.get(telegram_id) == user_id:
+                self.pop(telegram_id)
+
+
+# telegram_id -> users.id; ids never change, so entries only go stale when a user is edited or deleted
+user_id_cache = UserIdCache(maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL)
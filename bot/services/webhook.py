@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from config.config import config
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrent_updates: int,
+        max_pending_updates: int,
+        **kwargs
+    ):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self.max_pending_updates = max_pending_updates
+        self._semaphore = asyncio.Semaphore(max_concurrent_updates)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        # Telegram redelivers on non-2xx, so shed load instead of queueing without bound
+        if len(self._background_feed_update_tasks) >= self.max_pending_updates:
+            logging.warning("Webhook backlog is full, asking Telegram to retry")
+            return web.Response(status=503)
+        return await super()._handle_request_background(bot, request)
+
+    async def _background_feed_update(self, bot: Bot, update: dict):
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    secret_token = config.WEBHOOK_SECRET.get_secret_value() or None
+
+    app = web.Application()
+    BoundedRequestHandler(
+        dp,
+        bot,
+        max_concurrent_updates=config.WEBHOOK_MAX_CONCURRENT_UPDATES,
+        max_pending_updates=config.WEBHOOK_MAX_PENDING_UPDATES,
+        secret_token=secret_token
+    ).register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        url=config.webhook_url,
+        secret_token=secret_token,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=min(config.WEBHOOK_MAX_CONCURRENT_UPDATES, 100)
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT).start()
+    logging.info(f"Webhook server listening on {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
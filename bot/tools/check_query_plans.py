@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert, select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.scratch import scratch_engine
+from config.config import config
+from models.postgres_models import Booking, Room, User
+from services.booking_partitions import earliest_check_in, ensure_partitions, list_partitions
+from services.postgres_crud.booking_crud import BookingCRUD
+from services.postgres_crud.booking_stats_crud import BookingStatsCRUD
+from services.postgres_crud.room_crud import RoomCRUD
+from tools.seed_catalog import CHUNK, OCCUPANCY, room_bookings, room_rows, user_rows
+
+SCHEMA = "check_query_plans"
+# The planner rightly seq scans a partition this small, e.g. an empty future month
+SEQ_SCAN_MIN_ROWS = 1000
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def booking_scans(plan: dict, relations: dict) -> list[dict]:
+    found = [plan] if plan.get("Relation Name") in relations else []
+    for child in plan.get("Plans", []):
+        found += booking_scans(child, relations)
+    return found
+
+
+async def booking_relations(conn) -> dict:
+    rows = dict((await conn.execute(text(
+        "SELECT c.relname, c.reltuples FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'bookings'::regclass"
+    ))).all())
+    return {partition.name: (partition, rows[partition.name]) for partition in await list_partitions(conn)}
+
+
+def node_types(plan: dict) -> set[str]:
+    types = {f"{plan['Node Type']} on {plan['Index Name']}" if "Index Name" in plan else plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        types |= node_types(child)
+    return types
+
+
+async def seed(session_maker, rooms_count: int, users_count: int, rng: random.Random):
+    now = datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    async with session_maker() as session:
+        users = user_rows(users_count, rng)
+        for i in range(0, users_count, CHUNK):
+            await session.execute(insert(User), users[i:i + CHUNK])
+        await RoomCRUD(session).bulk_create_rooms(room_rows(rooms_count, rng))
+        user_ids = list((await session.execute(select(User.id))).scalars())
+        rooms = await session.execute(select(Room.id, Room.type, Room.price))
+
+        batch = []
+        for room_id, room_type, price in rooms:
+            batch.extend(room_bookings(
+                room_id, price, OCCUPANCY[room_type], user_ids,
+                today - timedelta(days=365), today + timedelta(days=180), now, rng
+            ))
+            if len(batch) >= CHUNK:
+                await session.execute(insert(Booking), batch)
+                batch = []
+        if batch:
+            await session.execute(insert(Booking), batch)
+        await session.commit()
+
+        # Settle the rollup so the check sees the steady-state incremental pass, not the backfill
+        await BookingStatsCRUD(session).refresh_rollup(timedelta(0))
+        await session.commit()
+        await session.execute(
+            update(Booking).where(Booking.id.in_(select(Booking.id).limit(5))).values(paid=True)
+        )
+        await session.commit()
+
+    async with session_maker() as session:
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+
+
+def hot_queries(rng: random.Random, rooms_count: int, users_count: int):
+    check_in = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=rng.randint(1, 60))
+    check_out = check_in + timedelta(days=3)
+    user_id = rng.randint(1, users_count)
+    room_id = rng.randint(1, rooms_count)
+    # (name, run, whether it must stay inside the partitions of stays still in progress)
+    return [
+        ("available rooms (SQL fallback)", lambda s: RoomCRUD(s)._query_available_rooms(check_in, check_out), True),
+        ("unpaid bookings listing", lambda s: BookingCRUD(s).list_unpaid_bookings(user_id), True),
+        ("active bookings listing", lambda s: BookingCRUD(s).list_active_bookings(user_id), True),
+        ("unpaid bookings by user", lambda s: BookingCRUD(s).get_unpaid_bookings_by_user_id(user_id), True),
+        ("active bookings by user", lambda s: BookingCRUD(s).get_active_bookings_by_user_id(user_id), True),
+        ("targeted room status refresh", lambda s: RoomCRUD(s).refresh_rooms_availability([room_id]), True),
+        ("reservation", lambda s: BookingCRUD(s).reserve(1000, user_id, room_id, check_in, check_out), True),
+        ("incremental stats rollup", lambda s: BookingStatsCRUD(s).refresh_rollup(timedelta(0)), False),
+        ("lifecycle sweep batch", lambda s: BookingCRUD(s).complete_finished_bookings(500), False),
+    ]
+
+
+async def main(rooms_count: int, users_count: int, seed_value: int, verbose: bool) -> int:
+    rng = random.Random(seed_value)
+    failures = 0
+    async with scratch_engine(SCHEMA) as engine:
+        async with engine.begin() as conn:
+            await ensure_partitions(conn, config.BOOKING_PARTITIONS_AHEAD, since=date.today() - timedelta(days=365))
+        session_maker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+        await seed(session_maker, rooms_count, users_count, rng)
+        async with engine.connect() as conn:
+            relations = await booking_relations(conn)
+        history_end = earliest_check_in(datetime.now()).date()
+
+        for name, run, hot in hot_queries(rng, rooms_count, users_count):
+            async with session_maker() as session:
+                with capture_statements(engine) as statements:
+                    await run(session)
+                await session.rollback()
+
+            async with engine.connect() as conn:
+                for statement, parameters in statements:
+                    if "bookings" not in statement:
+                        continue
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = json.loads(result.scalar())[0]["Plan"]
+                    scans = booking_scans(plan, relations)
+                    touched = {scan["Relation Name"] for scan in scans}
+                    seq = [
+                        scan for scan in scans
+                        if scan["Node Type"] == "Seq Scan" and relations[scan["Relation Name"]][1] >= SEQ_SCAN_MIN_ROWS
+                    ]
+                    history = sorted(
+                        relation for relation in touched
+                        if hot and relations[relation][0].end is not None and relations[relation][0].end <= history_end
+                    )
+                    failed = bool(seq or history)
+                    failures += failed
+                    print(
+                        f"{'FAIL' if failed else 'ok':>4}  {name}: {len(touched)} partitions, "
+                        f"{', '.join(sorted(node_types(plan)))}"
+                    )
+                    if history:
+                        print(f"      reads finished months: {', '.join(history)}")
+                    if verbose or failed:
+                        print("      " + " ".join(statement.split())[:300])
+
+    print(
+        f"\n{failures} booking queries scan too much of bookings" if failures
+        else "\nAll booking queries use indexes and hot ones stay in recent partitions"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN the hot booking queries against seeded data and fail on sequential scans "
+        "of bookings or reads of finished months"
+    )
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.rooms, args.users, args.seed, args.verbose)))
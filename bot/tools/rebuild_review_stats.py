@@ -0,0 +1,19 @@
+import asyncio
+
+from services.mongo_crud.review_crud import ReviewCRUD
+from services.mongo_database import MongoDatabase
+
+
+async def main():
+    mongo_db = MongoDatabase()
+    await mongo_db.connect()
+    crud = ReviewCRUD(mongo_db.get_reviews_collection())
+    summary = await crud.rebuild_stats()
+    print(
+        f"Approved reviews: {summary['count']}, average rating {summary['average']:.2f}, "
+        f"histogram {dict(sorted(summary['histogram'].items()))}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
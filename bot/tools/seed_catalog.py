@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from config.config import config
+from models.postgres_models import Booking, BookingStatusEnum, Room, User
+from services.booking_partitions import ensure_partitions, lock_partitions
+from services.migrations import run_migrations
+from services.postgres_crud.room_crud import RoomCRUD
+from services.postgres_database import PostgresDatabase
+
+# Generated rows are tagged so a re-run replaces them without touching real data
+ROOM_PREFIX = "G"
+BASE_TELEGRAM_ID = 1_900_000_000
+CHUNK = 5000
+
+# type, human name, share of rooms, base price, capacity, average occupancy
+ROOM_TYPES = [
+    ("economy", "Эконом", 0.35, 2000, 2, 0.70),
+    ("standard", "Стандарт", 0.45, 3500, 3, 0.65),
+    ("business", "Бизнес", 0.15, 6000, 4, 0.55),
+    ("vip", "VIP", 0.05, 12000, 6, 0.40),
+]
+OCCUPANCY = {room_type: occupancy for room_type, *_, occupancy in ROOM_TYPES}
+
+# Mean days between making a booking and arriving
+LEAD_DAYS = 21
+STAY_NIGHTS = [1, 2, 3, 4, 5, 6, 7, 10, 14]
+STAY_WEIGHTS = [22, 26, 18, 11, 7, 5, 6, 3, 2]
+MEAN_STAY = sum(n * w for n, w in zip(STAY_NIGHTS, STAY_WEIGHTS)) / sum(STAY_WEIGHTS)
+# Demand multiplier by month: summer peak, a bump for the winter holidays
+SEASONALITY = [1.0, 0.7, 0.8, 0.8, 1.0, 1.25, 1.4, 1.4, 1.1, 0.85, 0.75, 1.05]
+
+NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Елена", "Иван", "Ольга", "Михаил", "Наталья"]
+SURNAMES = ["Иванов", "Смирнова", "Кузнецов", "Попова", "Васильев", "Соколова", "Морозов", "Волкова"]
+
+
+def room_rows(count: int, rng: random.Random) -> list[dict]:
+    types = rng.choices(ROOM_TYPES, weights=[share for _, _, share, *_ in ROOM_TYPES], k=count)
+    return [
+        {
+            "number": f"{ROOM_PREFIX}{i:06}",
+            "human_name": human_name,
+            "type": room_type,
+            "price": round(price * rng.uniform(0.9, 1.2), -1),
+            "capacity": capacity,
+            "description": f"{room_type.capitalize()} номер"
+        }
+        for i, (room_type, human_name, _, price, capacity, _) in enumerate(types, 1)
+    ]
+
+
+def user_rows(count: int, rng: random.Random) -> list[dict]:
+    return [
+        {"telegram_id": BASE_TELEGRAM_ID + i, "name": rng.choice(NAMES), "surname": rng.choice(SURNAMES)}
+        for i in range(count)
+    ]
+
+
+def room_bookings(room_id: int, price, occupancy: float, user_ids: list[int],
+                  start: datetime, end: datetime, now: datetime, rng: random.Random):
+    # Alternating stays and idle gaps; the mean gap is sized so the room hits its seasonal occupancy
+    day = start + timedelta(days=rng.randint(0, 7))
+    while day < end:
+        demand = min(occupancy * SEASONALITY[day.month - 1], 0.95)
+        # Leisure guests lean towards Friday and Saturday arrivals
+        if day.weekday() in (2, 3) and rng.random() < 0.4:
+            day += timedelta(days=4 - day.weekday())
+        nights = rng.choices(STAY_NIGHTS, weights=STAY_WEIGHTS)[0]
+        check_in, check_out = day, day + timedelta(days=nights)
+        created_at = min(check_in - timedelta(days=rng.expovariate(1 / LEAD_DAYS)), now)
+
+        if check_out <= now:
+            status = BookingStatusEnum.CANCELLED if rng.random() < 0.08 else BookingStatusEnum.COMPLETED
+            paid = status == BookingStatusEnum.COMPLETED
+        else:
+            status = BookingStatusEnum.CANCELLED if rng.random() < 0.10 else BookingStatusEnum.ACTIVE
+            paid = status == BookingStatusEnum.ACTIVE and (check_in <= now or rng.random() < 0.6)
+
+        cancelled_at = None
+        if status == BookingStatusEnum.CANCELLED:
+            cancelled_at = created_at + (min(check_in, now) - created_at) * rng.random()
+
+        yield {
+            "total_price": price * nights,
+            "user_id": rng.choice(user_ids),
+            "room_id": room_id,
+            "check_in": check_in,
+            "check_out": check_out,
+            "status": status,
+            "paid": paid,
+            "created_at": created_at.astimezone(),
+            "cancelled_at": cancelled_at.astimezone() if cancelled_at else None,
+        }
+        idle = rng.expovariate(demand / ((1 - demand) * MEAN_STAY))
+        day = check_out + timedelta(days=round(idle))
+
+
+async def clear(session):
+    generated_users = select(User.id).where(User.telegram_id >= BASE_TELEGRAM_ID, User.telegram_id < 2_000_000_000)
+    generated_rooms = select(Room.id).where(Room.number.like(f"{ROOM_PREFIX}%"))
+    await session.execute(delete(Booking).where(Booking.room_id.in_(generated_rooms)))
+    await session.execute(delete(Booking).where(Booking.user_id.in_(generated_users)))
+    await session.execute(delete(Room).where(Room.id.in_(generated_rooms)))
+    await session.execute(delete(User).where(User.id.in_(generated_users)))
+
+
+async def main(rooms_count: int, users_count: int, days_back: int, days_ahead: int, seed: int | None):
+    rng = random.Random(seed)
+    now = datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start, end = today - timedelta(days=days_back), today + timedelta(days=days_ahead)
+
+    postgres_db = PostgresDatabase()
+    await run_migrations(postgres_db.engine)
+    async with postgres_db.engine.begin() as conn:
+        await lock_partitions(conn)
+        await ensure_partitions(conn, config.BOOKING_PARTITIONS_AHEAD, since=start.date())
+    started = time.perf_counter()
+    bookings_count = 0
+    try:
+        async with postgres_db.session_scope() as session:
+            await clear(session)
+
+            users = user_rows(users_count, rng)
+            user_ids = []
+            for i in range(0, users_count, CHUNK):
+                result = await session.execute(insert(User).values(users[i:i + CHUNK]).returning(User.id))
+                user_ids.extend(result.scalars().all())
+
+            await RoomCRUD(session).bulk_create_rooms(room_rows(rooms_count, rng))
+            rooms = await session.execute(
+                select(Room.id, Room.type, Room.price).where(Room.number.like(f"{ROOM_PREFIX}%"))
+            )
+
+            batch = []
+            for room_id, room_type, price in rooms:
+                batch.extend(room_bookings(room_id, price, OCCUPANCY[room_type], user_ids, start, end, now, rng))
+                if len(batch) >= CHUNK:
+                    await session.execute(insert(Booking), batch)
+                    bookings_count += len(batch)
+                    batch = []
+            if batch:
+                await session.execute(insert(Booking), batch)
+                bookings_count += len(batch)
+
+        async with postgres_db.async_session_maker() as session:
+            await RoomCRUD(session).refresh_rooms_availability()
+
+        print(
+            f"Seeded {rooms_count} rooms, {users_count} users and {bookings_count} bookings "
+            f"({start:%d.%m.%Y} – {end:%d.%m.%Y}) in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        await postgres_db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replace the generated room catalog with a fresh synthetic one")
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=20000, help="at least 1")
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--days-ahead", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.users, args.days_back, args.days_ahead, args.seed))